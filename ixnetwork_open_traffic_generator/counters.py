@@ -0,0 +1,233 @@
+import time
+from array import array
+from collections import deque
+
+
+class Counters(object):
+    """Client side delta, rate and loss computation for port and flow results
+
+    Every poll reads only the raw counters of ports and flows and stores them
+    as one sample. A sample is a preallocated array of
+    len(names) * len(counters) values so that deltas between any two samples
+    are computed with a single pass over two flat arrays.
+
+    A baseline is a named snapshot of the raw port and flow counters and of
+    the flow counters per ingress row if any ingress_result_name is tracked.
+    While a baseline is selected port and flow results are returned
+    relative to it, which replaces clearing the server statistics.
+
+    Args
+    ----
+    - ixnetworkapi (IxNetworkApi): instance of the ixnetworkapi class
+    - history (int): The number of samples kept for window computations
+    """
+    _PORT_COUNTERS = ['frames_tx', 'frames_rx', 'bytes_tx', 'bytes_rx']
+    _FLOW_COUNTERS = ['frames_tx', 'frames_rx', 'bytes_rx']
+    _PORT_BASELINE_COUNTERS = _PORT_COUNTERS + [
+        'pfc_class_%s_frames_rx' % i for i in range(8)
+    ]
+
+    def __init__(self, ixnetworkapi, history=600):
+        self._api = ixnetworkapi
+        self._history = history
+        self.reset()
+
+    def reset(self):
+        """Discard all samples and baselines
+        """
+        self._samples = {
+            'port': _Samples(Counters._PORT_COUNTERS, self._history),
+            'flow': _Samples(Counters._FLOW_COUNTERS, self._history, loss=True)
+        }
+        self._baselines = {}
+        self._baseline = None
+
+    @property
+    def baseline(self):
+        """The name of the selected baseline, None if results are absolute
+        """
+        return self._baseline
+
+    def set_baseline(self, name='default'):
+        """Snapshot the raw port, flow and ingress counters as the named
+        baseline and select it
+        """
+        self._baselines[name] = {
+            'port': self._read('port', Counters._PORT_BASELINE_COUNTERS),
+            'flow': self._read('flow', Counters._FLOW_COUNTERS),
+            'ingress': self._api.traffic_item._read_ingress_counters(
+                Counters._FLOW_COUNTERS)
+        }
+        self._baseline = name
+
+    def select_baseline(self, name):
+        """Select a previously set baseline, None returns absolute results
+        """
+        if name is not None and name not in self._baselines:
+            raise KeyError('%s is not a baseline' % name)
+        self._baseline = name
+
+    def apply_baseline(self, kind, rows):
+        """Subtract the selected baseline from a dict of names to result rows,
+        ingress rows are keyed by the tuples of TrafficItem._ingress_rows
+
+        A counter that is lower than its baseline has been cleared on the
+        server since the baseline was set and is returned unchanged.
+        The loss of a flow is recomputed when both frame counters are present.
+        """
+        if self._baseline is None:
+            return
+        baseline = self._baselines[self._baseline].get(kind, {})
+        for name, row in rows.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            for counter, value in base.items():
+                if counter in row and row[counter] >= value:
+                    row[counter] -= value
+            if kind in ['flow', 'ingress'] and 'loss' in row and 'frames_tx' in row and 'frames_rx' in row:
+                tx = row['frames_tx']
+                row['loss'] = (tx - row['frames_rx']) * 100.0 / tx if tx > 0 else 0.0
+
+    def _read(self, kind, counters):
+        request = self._api._dict_to_obj({
+            '%s_names' % kind: None,
+            'column_names': ['name'] + counters
+        })
+        if kind == 'port':
+            rows = self._api.vport.results(request, baseline=False)
+        else:
+            rows = self._api.traffic_item.results(request, baseline=False)
+        return dict((row['name'], dict(
+            (counter, row[counter]) for counter in counters if counter in row))
+            for row in rows)
+
+    def poll(self):
+        """Read raw port and flow counters and return the per-interval
+        deltas, rates and loss since the previous poll
+
+        The rates are computed client side from the counter deltas and the
+        elapsed time between the two polls.
+        """
+        timestamp = time.time()
+        for kind, counters in [('port', Counters._PORT_COUNTERS),
+                               ('flow', Counters._FLOW_COUNTERS)]:
+            rows = self._read(kind, counters)
+            self._samples[kind].add(timestamp, [
+                dict(row, name=name) for name, row in rows.items()
+            ])
+        return {
+            'port': self._last_interval('port'),
+            'flow': self._last_interval('flow')
+        }
+
+    def _last_interval(self, kind):
+        samples = self._samples[kind]
+        if len(samples.values) < 2:
+            return []
+        return samples.rows(*samples.delta(-2, -1))
+
+    def window(self, seconds, kind='flow'):
+        """Return deltas, rates and loss over the last number of seconds
+
+        The window starts at the oldest sample that is no older than seconds
+        before the most recent sample.
+        """
+        samples = self._samples[kind]
+        if len(samples.values) < 2:
+            return []
+        last = len(samples.times) - 1
+        first = last
+        while first > 0 and samples.times[last] - samples.times[first - 1] <= seconds:
+            first -= 1
+        if first == last:
+            first = last - 1
+        return samples.rows(*samples.delta(first, last))
+
+    def convergence(self, flow_name):
+        """Return convergence metrics of a flow from the stored samples
+
+        - time_since_zero_loss: seconds since the end of the last poll
+            interval that had no frame loss, None if no such interval exists
+        - frames_lost: frames lost in the consecutive lossy intervals since
+            that zero loss interval, which is the loss of the current event
+        - convergence_time: duration of those lossy intervals
+        """
+        samples = self._samples['flow']
+        metrics = {
+            'name': flow_name,
+            'time_since_zero_loss': None,
+            'frames_lost': 0,
+            'convergence_time': 0.0
+        }
+        if flow_name not in samples.index or len(samples.values) < 2:
+            return metrics
+        width = len(samples.counters)
+        offset = samples.index[flow_name] * width
+        last = len(samples.values) - 1
+        for i in range(last, 0, -1):
+            current = samples.values[i]
+            previous = samples.values[i - 1]
+            lost = (current[offset] - previous[offset]) - (
+                current[offset + 1] - previous[offset + 1])
+            if lost <= 0:
+                metrics['time_since_zero_loss'] = samples.times[last] - samples.times[i]
+                break
+            metrics['frames_lost'] += int(lost)
+            metrics['convergence_time'] += samples.times[i] - samples.times[i - 1]
+        return metrics
+
+
+class _Samples(object):
+    """Flat array samples of the raw counters of a set of named rows
+    """
+    def __init__(self, counters, history, loss=False):
+        self.counters = counters
+        self.loss = loss
+        self.names = []
+        self.index = {}
+        self.times = deque(maxlen=history)
+        self.values = deque(maxlen=history)
+
+    def add(self, timestamp, rows):
+        names = [row['name'] for row in rows]
+        if names != self.names:
+            self.names = names
+            self.index = dict((name, i) for i, name in enumerate(names))
+            self.times.clear()
+            self.values.clear()
+        width = len(self.counters)
+        values = array('d', [0.0]) * (len(names) * width)
+        for i, row in enumerate(rows):
+            offset = i * width
+            for j, counter in enumerate(self.counters):
+                values[offset + j] = float(row.get(counter, 0))
+        self.times.append(timestamp)
+        self.values.append(values)
+
+    def delta(self, first, last):
+        """Return (interval, flat list of counter deltas) between two samples
+        """
+        interval = self.times[last] - self.times[first]
+        deltas = [
+            b - a
+            for a, b in zip(self.values[first], self.values[last])
+        ]
+        return interval, deltas
+
+    def rows(self, interval, deltas):
+        width = len(self.counters)
+        rows = []
+        for i, name in enumerate(self.names):
+            row = {'name': name, 'interval': interval}
+            for j, counter in enumerate(self.counters):
+                delta = deltas[i * width + j]
+                row['%s_delta' % counter] = int(delta)
+                row['%s_rate' % counter] = delta / interval if interval > 0 else 0.0
+            if self.loss is True:
+                lost = deltas[i * width] - deltas[i * width + 1]
+                row['frames_lost'] = int(lost)
+                tx = deltas[i * width]
+                row['loss'] = (lost * 100.0 / tx) if tx > 0 else 0.0
+            rows.append(row)
+        return rows
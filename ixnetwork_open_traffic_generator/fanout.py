@@ -0,0 +1,122 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FanOut(object):
+    """Run the same operations against many IxNetworkApi sessions at once
+
+    Every operation is issued to all sessions concurrently so the total
+    time is that of the slowest session.
+    An error in one session does not stop the others, all errors are
+    collected and raised together once every session has finished.
+
+    Args
+    ----
+    - apis (dict(str, IxNetworkApi)): A dict of session names to IxNetworkApi instances
+    - port_locations (dict(str, dict(str, str))): An optional dict of session names to
+        a dict of port names to locations.
+        Port locations of the config are replaced with these in that session.
+    """
+    def __init__(self, apis, port_locations=None):
+        self._apis = apis
+        self._port_locations = {} if port_locations is None else port_locations
+        self._errors = {}
+        self._results = {}
+
+    @property
+    def apis(self):
+        return self._apis
+
+    @property
+    def errors(self):
+        """A dict of session names to the exception raised by the last operation
+        """
+        return self._errors
+
+    @property
+    def results(self):
+        """A dict of session names to the result of the last operation
+        Sessions that raised an error are not present
+        """
+        return self._results
+
+    def set_state(self, state):
+        """Set the state on every session
+
+        The state is serialized once and every session sets its own state
+        built from it, so the port locations of each session are applied
+        without affecting the others.
+        """
+        if isinstance(state, str) is False:
+            state = json.dumps(state, default=lambda x: x.__dict__)
+
+        def set_state(name, api):
+            session_state = json.loads(state)
+            config_state = session_state.get('config_state')
+            if session_state['choice'] == 'config_state' and config_state.get('config') is not None:
+                locations = self._port_locations.get(name, {})
+                for port in config_state['config'].get('ports') or []:
+                    if port['name'] in locations:
+                        port['location'] = locations[port['name']]
+            return api.set_state(session_state)
+
+        return self._execute(set_state)
+
+    def get_port_results(self, request):
+        """Return the port results of all sessions tagged with a session column
+        """
+        return self._merge(
+            self._execute(lambda name, api: api.get_port_results(request)))
+
+    def get_flow_results(self, request):
+        """Return the flow results of all sessions tagged with a session column
+        """
+        return self._merge(
+            self._execute(lambda name, api: api.get_flow_results(request)))
+
+    def close(self):
+        """Close every session
+        """
+        return self._execute(lambda name, api: api.close())
+
+    def _merge(self, results):
+        """Return the rows of all sessions with a session column
+        """
+        rows = []
+        for name, session_rows in results.items():
+            for row in session_rows:
+                row = dict(row)
+                row['session'] = name
+                rows.append(row)
+        return rows
+
+    def _execute(self, method):
+        """Execute method(name, api) on every session concurrently
+        Return a dict of session names to results
+        """
+        self._errors = {}
+        results = {}
+        futures = {}
+        with ThreadPoolExecutor(max_workers=max(len(self._apis), 1)) as executor:
+            for name, api in self._apis.items():
+                futures[name] = executor.submit(self._timed, name, method, api)
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    self._errors[name] = e
+        self._results = results
+        if len(self._errors) > 0:
+            raise Exception('\n'.join([
+                '%s: %s' % (name, error)
+                for name, error in self._errors.items()
+            ]))
+        return results
+
+    def _timed(self, name, method, api):
+        start = time.time()
+        result = method(name, api)
+        if api.assistant is not None:
+            api.info('session %s %ssecs' % (name, str(time.time() - start)))
+        return result
@@ -10,6 +10,10 @@ from ixnetwork_open_traffic_generator.validation import Validation
 from ixnetwork_open_traffic_generator.vport import Vport
 from ixnetwork_open_traffic_generator.ngpf import Ngpf
 from ixnetwork_open_traffic_generator.trafficitem import TrafficItem
+from ixnetwork_open_traffic_generator.counters import Counters
+from ixnetwork_open_traffic_generator.protocol import Protocol
+from ixnetwork_open_traffic_generator.throughput import Throughput
+from ixnetwork_open_traffic_generator.ixnobjects import IxnObjects
 
 
 class IxNetworkApi(Api):
@@ -23,13 +27,29 @@ class IxNetworkApi(Api):
         This is not required when connecting to single session environments
     - password (str): The password for Linux IxNetwork API Server multi session environments
         This is not required when connecting to single session environments
+    - session_pool (SessionPool): An optional pool of warm sessions
+        When present the session is leased from the pool instead of being created
+    - fold_devices (bool): Fold structurally identical devices of the same port
+        into one device group with a multiplier
+    - clear_stats (bool): Clear the statistics on every flow start.
+        If False a baseline of the port and flow counters is recorded instead
+        and port and flow results are relative to it
+    - gateway_timeout (int): Seconds to wait for the gateways of flow
+        endpoint devices to resolve on flow start
+    - gateway_errors (bool): Raise an error if the gateways are not resolved
+        within gateway_timeout, if False log a warning and start the flows
     """
     def __init__(self,
                  address='127.0.0.1',
                  port='11009',
                  username='admin',
                  password='admin',
-                 license_servers=[]):
+                 license_servers=[],
+                 session_pool=None,
+                 fold_devices=False,
+                 clear_stats=True,
+                 gateway_timeout=30,
+                 gateway_errors=True):
         """Create a session
         - address (str): The ip address of the TestPlatform to connect to 
         where test sessions will be created or connected to.
@@ -43,27 +63,84 @@ class IxNetworkApi(Api):
         self._username = username
         self._password = password
         self._license_servers = license_servers
+        self._session_pool = session_pool
+        self._clear_stats = clear_stats
         self._running_config = None
         self._config = None
+        self._config_objects = {}
+        self._ixn_objects = IxnObjects()
+        self._route_ranges = {}
         self._assistant = None
         self.validation = Validation(self)
         self.vport = Vport(self)
-        self.ngpf = Ngpf(self)
+        self.ngpf = Ngpf(self, fold_devices=fold_devices)
         self.traffic_item = TrafficItem(self)
+        self.counters = Counters(self)
+        self.protocol = Protocol(self,
+                                 gateway_timeout=gateway_timeout,
+                                 gateway_errors=gateway_errors)
+        self.throughput = Throughput(self)
 
     @property
     def config(self):
         return self._config
 
+    def set_route_ranges(self, bgpv4_name, route_ranges, route_count_per_device=1):
+        """Set the route ranges advertised by a Device.Bgpv4.
+        They are configured and validated with the next config state.
+
+        Device.Bgpv4 has no container for Device.Bgpv4RouteRange objects in
+        this version of the model so they are kept per bgpv4 name.
+
+        Args
+        ----
+        - bgpv4_name (str): The name of the Device.Bgpv4
+        - route_ranges (list(Device.Bgpv4RouteRange)): The route ranges,
+            an empty list removes the route ranges of the bgpv4
+        - route_count_per_device (int): The number of networks of every
+            route range per device
+        """
+        if route_ranges is None or len(route_ranges) == 0:
+            self._route_ranges.pop(bgpv4_name, None)
+        else:
+            self._route_ranges[bgpv4_name] = (list(route_ranges), route_count_per_device)
+
     def get_config_object(self, name):
         return self._config_objects[name]
 
     @property
     def ixn_objects(self):
         """A dict of all model unique names to ixn hrefs
+        that also maps ixn hrefs back to model unique names
         """
         return self._ixn_objects
 
+    def get_config_name(self, href):
+        """Returns the unique configuration name of an href or of its
+        closest registered parent
+        """
+        return self._ixn_objects.get_name(href)
+
+    def get_config_object_from_href(self, href):
+        """Returns the configuration object of an href or of its closest
+        registered parent, None if there is no such object or if several
+        objects share the href, see get_config_objects_from_href
+        """
+        name = self._ixn_objects.get_name(href)
+        if name is None:
+            return None
+        return self._config_objects.get(name)
+
+    def get_config_objects_from_href(self, href):
+        """Returns the list of configuration objects of an href or of its
+        closest registered parent such as every device of a folded device group
+        """
+        return [
+            self._config_objects[name]
+            for name in self._ixn_objects.get_names(href)
+            if name in self._config_objects
+        ]
+
     def get_ixn_object(self, name):
         """Returns an ixnetwork_restpy object given a unique configuration name
         """
@@ -114,7 +191,7 @@ class IxNetworkApi(Api):
         """
         self._config = config_state.config
         self._config_objects = {}
-        self._ixn_objects = {}
+        self._ixn_objects = IxnObjects()
         self._capture_request = None
         self._errors = []
         self.validation.validate_config()
@@ -209,6 +286,28 @@ class IxNetworkApi(Api):
             raise Exception('\n'.join(self._errors))
         return response
 
+    def get_device_results(self, request):
+        """Return the session state of devices
+
+        Args
+        ----
+        - request (Union[object, str, dict]): A request for device results with
+            optional device_names and column_names lists.
+            Columns are name, port, protocol, sessions_total, sessions_up,
+            sessions_down, sessions_not_started, gateways_resolved,
+            gateways_unresolved, routes_advertised, routes_rx
+        """
+        self._errors = []
+        if isinstance(request, str) is True:
+            request = json.loads(request)
+        if isinstance(request, dict) is True:
+            request = namedtuple('otg', ['device_names', 'column_names'])(
+                request.get('device_names'), request.get('column_names'))
+        response = self.ngpf.results(request)
+        if len(self._errors) > 0:
+            raise Exception('\n'.join(self._errors))
+        return response
+
     def add_error(self, error):
         """Add an error to the global errors
         """
@@ -221,12 +320,15 @@ class IxNetworkApi(Api):
         """Connect to an IxNetwork API Server.
         """
         if self._assistant is None:
-            self._assistant = SessionAssistant(
-                IpAddress=self._address,
-                RestPort=self._port,
-                UserName=self._username,
-                Password=self._password,
-                LogLevel=SessionAssistant.LOGLEVEL_INFO)
+            if self._session_pool is not None:
+                self._assistant = self._session_pool.lease()
+            else:
+                self._assistant = SessionAssistant(
+                    IpAddress=self._address,
+                    RestPort=self._port,
+                    UserName=self._username,
+                    Password=self._password,
+                    LogLevel=SessionAssistant.LOGLEVEL_INFO)
             self._ixnetwork = self._assistant.Session.Ixnetwork
             self._vport = self._ixnetwork.Vport
             self._topology = self._ixnetwork.Topology
@@ -235,6 +337,18 @@ class IxNetworkApi(Api):
             if len(self._license_servers) > 0:
                 self._ixnetwork.Globals.Licensing.LicensingServers = self._license_servers
 
+    def close(self):
+        """Release the session back to the session pool or remove it
+        """
+        self.protocol.close()
+        if self._assistant is None:
+            return
+        if self._session_pool is not None:
+            self._session_pool.release(self._assistant)
+        else:
+            self._assistant.Session.remove()
+        self._assistant = None
+
     def _request(self, method, url, payload=None):
         connection, url = self._assistant.Session._connection._normalize_url(
             url)
@@ -261,14 +375,17 @@ class IxNetworkApi(Api):
     def _remove(self, ixn_obj, items):
         """Remove any ixnetwork objects that are not found in the items list.
         If the items list does not exist remove everything.
+        The objects are deleted by href so that no name regex is needed.
         """
-        valid_names = [item.name for item in items]
-        invalid_names = []
+        valid_names = set()
+        if items is not None:
+            valid_names = set([item.name for item in items])
+        invalid_hrefs = []
         for item in ixn_obj.find():
             if item.Name not in valid_names:
-                invalid_names.append(item.Name)
-        if len(invalid_names) > 0:
-            ixn_obj.find(Name='^(%s)$' % '|'.join(invalid_names)).remove()
+                invalid_hrefs.append(item.href)
+        for href in invalid_hrefs:
+            self._ixnetwork._connection._delete(href)
 
     def _get_topology_name(self, port_name):
         return 'Topology %s' % port_name
@@ -304,9 +421,14 @@ class IxNetworkApi(Api):
         results = self._ixnetwork._connection._execute(url, payload)
         return results[0]['chassis'][0]['card'][0]
 
-    def select_vports(self):
+    def select_vports(self, vport_filters=[]):
         """Select all vports.
         Return them in a dict keyed by vport name.
+
+        Args
+        ----
+        - vport_filters (list(dict(property:'', 'regex':''))): A list of filters for the select.
+            A filter is a dict with a property name and a regex match
         """
         payload = {
             'selects': [{
@@ -320,11 +442,21 @@ class IxNetworkApi(Api):
                         'name', 'type', 'location', 'connectionState',
                         'connectionStatus', 'assignedTo', 'connectedTo'
                     ],
-                    'filters': []
+                    'filters': vport_filters
                 }, {
                     'child': 'l1Config',
                     'properties': ['currentType'],
                     'filters': []
+                }, {
+                    'child':
+                    'capture',
+                    'properties': [
+                        'hardwareEnabled', 'softwareEnabled',
+                        'isCaptureRunning', 'isControlCaptureRunning',
+                        'dataCaptureState', 'dataPacketCounter',
+                        'controlPacketCounter'
+                    ],
+                    'filters': []
                 }, {
                     'child': '^(eth.*|novus.*|uhd.*|atlas.*|ares.*|star.*)$',
                     'properties': ['*'],
@@ -0,0 +1,77 @@
+class IxnObjects(dict):
+    """A dict of unique config names to ixn hrefs that also maintains the
+    reverse dict of ixn hrefs to config names
+
+    Both directions are dict lookups so that mapping any number of selected
+    objects, stat view rows or hrefs back to config objects does not
+    require additional server requests or name matching.
+
+    Several config names can share one href, such as the devices of a folded
+    device group, so the reverse dict holds a list of names per href.
+    """
+    def __init__(self, *args, **kwargs):
+        super(IxnObjects, self).__init__()
+        self._names = {}
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, name, href):
+        if name in self:
+            self._remove_name(name)
+        super(IxnObjects, self).__setitem__(name, href)
+        self._names.setdefault(href, []).append(name)
+
+    def __delitem__(self, name):
+        self._remove_name(name)
+        super(IxnObjects, self).__delitem__(name)
+
+    def pop(self, name, *args):
+        if name in self:
+            self._remove_name(name)
+        return super(IxnObjects, self).pop(name, *args)
+
+    def clear(self):
+        self._names.clear()
+        super(IxnObjects, self).clear()
+
+    def update(self, *args, **kwargs):
+        for name, href in dict(*args, **kwargs).items():
+            self[name] = href
+
+    def setdefault(self, name, href=None):
+        if name not in self:
+            self[name] = href
+        return self[name]
+
+    def _remove_name(self, name):
+        href = dict.__getitem__(self, name)
+        names = self._names.get(href, [])
+        if name in names:
+            names.remove(name)
+        if len(names) == 0:
+            self._names.pop(href, None)
+
+    def get_name(self, href):
+        """Return the config name of the href or of its closest registered
+        parent such as the device group of a protocol stack href.
+        Return None if neither the href nor any parent is registered or if
+        the closest registered href is shared by several names, see get_names.
+        """
+        names = self.get_names(href)
+        if len(names) != 1:
+            return None
+        return names[0]
+
+    def get_names(self, href):
+        """Return the config names of the href or of its closest registered
+        parent in the order they were registered.
+        Return an empty list if neither the href nor any parent is registered.
+        """
+        while href is not None and len(href) > 0:
+            names = self._names.get(href)
+            if names is not None:
+                return list(names)
+            pieces = href.rsplit('/', 2)
+            if len(pieces) < 3:
+                break
+            href = pieces[0]
+        return []
@@ -1,12 +1,22 @@
 import json
+import re
+from ixnetwork_open_traffic_generator.patternoptimizer import PatternOptimizer
 
 
 class Ngpf(object):
     """Ngpf configuration
 
+    The existing /topology tree is read with one select and the entire
+    tree including all multivalues is written with a single
+    resourcemanager import, so the number of requests does not grow with
+    the number of devices or multivalues.
+
     Args
     ----
     - ixnetworkapi (IxNetworkApi): instance of the ixnetworkapi class
+    - fold_devices (bool): Fold structurally identical devices of the same
+        container into one /topology/deviceGroup with a multiplier.
+        Every folded device is a slice of the device group.
     """
     _TPID_MAP = {
         '8100': 'ethertype8100',
@@ -16,171 +26,859 @@ class Ngpf(object):
         '9300': 'ethertype9300',
     }
 
-    def __init__(self, ixnetworkapi):
+    _STACK_CHILDREN = [
+        'ethernet', 'vlan', 'ipv4', 'ipv6', 'bgpIpv4Peer', 'networkGroup'
+    ]
+
+    _RESULT_COLUMNS = [
+        'name', 'port', 'protocol', 'sessions_total', 'sessions_up',
+        'sessions_down', 'sessions_not_started', 'gateways_resolved',
+        'gateways_unresolved', 'routes_advertised', 'routes_rx'
+    ]
+
+    _SESSION_COLUMNS = {
+        'sessions_total': 'total',
+        'sessions_up': 'up',
+        'sessions_down': 'down',
+        'sessions_not_started': 'notStarted'
+    }
+
+    _ROUTE_CAPTIONS = {
+        'routes_advertised': 'Routes Advertised',
+        'routes_rx': 'Routes Rx'
+    }
+
+    _DEVICE_STACK = {
+        'ethernet': 'ethernet',
+        'ipv4': 'ipv4',
+        'ipv6': 'ipv6',
+        'bgpv4': 'bgpIpv4Peer'
+    }
+
+    _FOLD_PATTERNS = {
+        'ethernet': ['mac', 'mtu'],
+        'vlan': ['id', 'priority'],
+        'ipv4': ['address', 'gateway', 'prefix'],
+        'ipv6': ['address', 'gateway', 'prefix'],
+        'bgpv4': []
+    }
+
+    _FOLD_CHILDREN = {
+        'bgpv4': 'ipv4',
+        'ipv4': 'ethernet',
+        'ipv6': 'ethernet'
+    }
+
+    def __init__(self, ixnetworkapi, fold_devices=False):
         self._api = ixnetworkapi
+        self._optimizer = PatternOptimizer()
+        self._fold_devices = fold_devices
+        self._folded = {}
+        self._slices = {}
 
     def config(self):
         """Transform /components/schemas/Device into /topology
+        1) remove any topology, device group or protocol stack that is not
+           part of the config using one select of the existing tree
+        2) import the topology/deviceGroup/ethernet/vlan/ipv4/ipv6/bgpIpv4Peer
+           and networkGroup/ipv4PrefixPools tree and all multivalues as one
+           xpath document
+        3) register all resulting hrefs from one select
         """
         self._imports = []
-        self._configure_topology(self._api._topology, self._api.config.devices)
+        self._resource_manager = self._api._ixnetwork.ResourceManager
+        devices = self._api.config.devices
+        if devices is None:
+            devices = []
+        devices = self._fold(devices)
+        topologies = self._select_topologies()
+        if self._remove_topologies(topologies, devices) is True:
+            topologies = self._select_topologies()
+        self._configure_topology(topologies, devices)
+        self._import(self._imports)
+        self._register_objects(self._select_topologies())
 
-    def _update(self, ixn_object, **kwargs):
-        update = False
-        for name, value in kwargs.items():
-            if getattr(ixn_object, name) != value:
-                update = True
-        if update is True:
-            ixn_object.update(**kwargs)
+    def get_device_slice(self, name):
+        """Return the (device group href, start, count) of a folded device
+        or None if the device has its own device group.
+        The start is the 1 based index of the device in the device group.
+        """
+        return self._slices.get(name)
 
-    def _configure_topology(self, ixn_topology, devices):
-        """One /topology for every unique device.container_name
-        Topology name is device.container_name
+    def get_device_group_name(self, name):
+        """Return the name of the device group of a device
         """
-        topologies = {}
-        for device in devices:
-            topology = lambda: None
-            topology.name = self._api._get_topology_name(device.container_name)
-            topologies[topology.name] = topology
-        self._api._remove(ixn_topology, topologies.values())
-        for device in devices:
-            ixn_topology.find(
-                Name='^%s$' % self._api._get_topology_name(device.container_name))
-            if len(ixn_topology) > 0:
-                self._api._remove(ixn_topology.DeviceGroup, [device])
+        for device_group_name, devices in self._folded.items():
+            for device in devices:
+                if device.name == name:
+                    return device_group_name
+        return name
+
+    def _fold(self, devices):
+        """Replace every set of structurally identical devices of the same
+        container with one folded device when fold_devices is enabled.
+
+        Devices can be folded when their device_count is 1, every pattern
+        is fixed and they have no route ranges. The fixed values of the
+        devices become one list pattern per property that is compressed by
+        _configure_list.
+        """
+        self._folded = {}
+        self._slices = {}
+        if self._fold_devices is False:
+            return devices
+        groups = {}
+        order = []
         for device in devices:
-            args = {
-                'Name': self._api._get_topology_name(device.container_name),
-                'Ports': [self._api.ixn_objects[device.container_name]]
-            }
-            ixn_topology.find(Name='^%s$' % args['Name'])
-            if len(ixn_topology) == 0:
-                ixn_topology.add(**args)
-            else:
-                self._update(ixn_topology, **args)
-            self._api.ixn_objects[ixn_topology.Name] = ixn_topology.href
-            self._configure_device_group(ixn_topology.DeviceGroup, device)
+            key = self._get_fold_key(device)
+            if key is None:
+                key = device.name
+            if key not in groups:
+                groups[key] = []
+                order.append(key)
+            groups[key].append(device)
+        folded_devices = []
+        for key in order:
+            group = groups[key]
+            if len(group) == 1:
+                folded_devices.append(group[0])
+                continue
+            name = '%s..%s' % (group[0].name, group[-1].name)
+            self._folded[name] = group
+            folded_device = self._clone(group[0],
+                                        name=name,
+                                        device_count=len(group))
+            setattr(folded_device, group[0].choice,
+                    self._fold_node(group[0].choice, [
+                        getattr(device, device.choice) for device in group
+                    ]))
+            folded_devices.append(folded_device)
+        return folded_devices
 
-    def _configure_device_group(self, ixn_device_group, device):
-        """Transform /components/schemas/Device into /topology/deviceGroup
-        One /topology/deviceGroup for every device in port.devices 
+    def _get_fold_key(self, device):
+        """Return a key that is equal for devices that can be folded or
+        None if the device cannot be folded
         """
-        args = {'Name': device.name, 'Multiplier': device.device_count}
-        ixn_device_group.find(Name='^%s$' % device.name)
-        if len(ixn_device_group) == 0:
-            ixn_device_group.add(**args)[-1]
-        else:
-            self._update(ixn_device_group, **args)
-        self._api.ixn_objects[device.name] = ixn_device_group.href
+        if device.device_count != 1 or device.choice not in Ngpf._FOLD_PATTERNS:
+            return None
+        key = [device.container_name, device.choice]
+        kind = device.choice
+        node = getattr(device, kind)
+        if len(self._get_route_ranges(node if kind == 'bgpv4' else None)[0]) > 0:
+            return None
+        while node is not None:
+            nodes = [(kind, node)]
+            if kind == 'ethernet':
+                vlans = node.vlans if node.vlans is not None else []
+                key.append(len(vlans))
+                for vlan in vlans:
+                    if vlan.tpid is not None and vlan.tpid.choice != 'fixed':
+                        return None
+                    key.append(None if vlan.tpid is None else vlan.tpid.fixed)
+                    nodes.append(('vlan', vlan))
+            for node_kind, pattern_node in nodes:
+                for attribute in Ngpf._FOLD_PATTERNS[node_kind]:
+                    pattern = getattr(pattern_node, attribute, None)
+                    if pattern is None:
+                        key.append(None)
+                    elif pattern.choice != 'fixed':
+                        return None
+                    else:
+                        key.append(attribute)
+            kind = Ngpf._FOLD_CHILDREN.get(kind)
+            node = None if kind is None else getattr(node, kind)
+        return tuple(key)
+
+    def _fold_node(self, kind, nodes):
+        """Return a copy of the first node with list patterns of the fixed
+        values of every node
+        """
+        folded_node = self._clone(nodes[0])
+        for attribute in Ngpf._FOLD_PATTERNS[kind]:
+            pattern = getattr(nodes[0], attribute, None)
+            if pattern is None:
+                continue
+            setattr(folded_node, attribute,
+                    self._clone(pattern,
+                                choice='list',
+                                fixed=None,
+                                list=[
+                                    getattr(node, attribute).fixed
+                                    for node in nodes
+                                ]))
+        if kind == 'ethernet' and nodes[0].vlans is not None:
+            folded_node.vlans = [
+                self._fold_node('vlan', [node.vlans[i] for node in nodes])
+                for i in range(len(nodes[0].vlans))
+            ]
+        child = Ngpf._FOLD_CHILDREN.get(kind)
+        if child is not None:
+            setattr(folded_node, child,
+                    self._fold_node(child,
+                                    [getattr(node, child) for node in nodes]))
+        return folded_node
+
+    def _clone(self, config_object, **kwargs):
+        """Shallow copy a config object without modifying the config
+        """
+        clone = lambda: None
+        clone.__dict__.update(vars(config_object))
+        clone.__dict__.update(kwargs)
+        return clone
+
+    def _import(self, imports):
+        if len(imports) > 0:
+            self._resource_manager.ImportConfig(json.dumps(imports), False)
+
+    def _select_topologies(self):
+        """Select the name, href and xpath of every object in the /topology tree.
+        Return the topologies in a dict keyed by topology name.
+        """
+        children = [{
+            'child': 'topology',
+            'properties': ['name'],
+            'filters': []
+        }, {
+            'child': 'deviceGroup',
+            'properties': ['name'],
+            'filters': []
+        }]
+        for child in Ngpf._STACK_CHILDREN:
+            children.append({
+                'child': child,
+                'properties': ['name'],
+                'filters': []
+            })
+        payload = {
+            'selects': [{
+                'from': '/',
+                'properties': [],
+                'children': children,
+                'inlines': []
+            }]
+        }
+        url = '%s/operations/select?xpath=true' % self._api._ixnetwork.href
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        topologies = {}
+        for topology in results[0].get('topology', []):
+            topologies[topology['name']] = topology
+        return topologies
+
+    def _get_stack(self, device):
+        """Return the (ethernet, ipv4, ipv6, bgpv4) config objects of a device
+        """
+        ethernet = ipv4 = ipv6 = bgpv4 = None
         if device.choice == 'ethernet':
-            self._configure_ethernet(ixn_device_group.Ethernet,
-                                     device.ethernet)
+            ethernet = device.ethernet
         elif device.choice == 'ipv4':
-            ixn_ethernet = self._configure_ethernet(ixn_device_group.Ethernet,
-                                                    device.ipv4.ethernet)
-            self._configure_ipv4(ixn_ethernet.Ipv4, device.ipv4)
+            ipv4 = device.ipv4
+            ethernet = ipv4.ethernet
         elif device.choice == 'ipv6':
-            ixn_ethernet = self._configure_ethernet(ixn_device_group.Ethernet,
-                                                    device.ipv6.ethernet)
-            self._configure_ipv6(ixn_ethernet.Ipv6, device.ipv6)
+            ipv6 = device.ipv6
+            ethernet = ipv6.ethernet
         elif device.choice == 'bgpv4':
-            ixn_ethernet = self._configure_ethernet(ixn_device_group.Ethernet,
-                                                    device.bgpv4.ipv4.ethernet)
-            ixn_ipv4 = self._configure_ipv4(ixn_ethernet.Ipv4,
-                                            device.bgpv4.ipv4)
-            self._configure_bgpv4(ixn_ipv4.BgpIpv4Peer, device.bgpv4)
+            bgpv4 = device.bgpv4
+            ipv4 = bgpv4.ipv4
+            ethernet = ipv4.ethernet
+        return ethernet, ipv4, ipv6, bgpv4
+
+    def _get_route_ranges(self, bgpv4):
+        """Return the (route ranges, route_count_per_device) of a bgpv4,
+        see IxNetworkApi.set_route_ranges
+        """
+        if bgpv4 is None:
+            return [], 1
+        return self._api._route_ranges.get(bgpv4.name, ([], 1))
+
+    def _find(self, ixn_objects, name):
+        for ixn_object in ixn_objects:
+            if ixn_object['name'] == name:
+                return ixn_object
+        return None
+
+    def _remove_topologies(self, topologies, devices):
+        """Remove every existing object that does not match the config.
+        Return True if anything was removed.
+        """
+        expected = {}
+        for device in devices:
+            name = self._api._get_topology_name(device.container_name)
+            expected.setdefault(name, {})[device.name] = device
+        hrefs = []
+        for topology_name, topology in topologies.items():
+            if topology_name not in expected:
+                hrefs.append(topology['href'])
+                continue
+            for device_group in topology.get('deviceGroup', []):
+                device = expected[topology_name].get(device_group['name'])
+                if device is None:
+                    hrefs.append(device_group['href'])
+                    continue
+                self._remove_stack(device_group, device, hrefs)
+        for href in hrefs:
+            self._api._ixnetwork._connection._delete(href)
+        return len(hrefs) > 0
+
+    def _remove_stack(self, device_group, device, hrefs):
+        """Add the href of any protocol stack that does not match the device
+        """
+        ethernet, ipv4, ipv6, bgpv4 = self._get_stack(device)
+        route_range_names = [
+            route_range.name for route_range in self._get_route_ranges(bgpv4)[0]
+        ]
+        for ixn_network_group in device_group.get('networkGroup', []):
+            if ixn_network_group['name'] not in route_range_names:
+                hrefs.append(ixn_network_group['href'])
+        for ixn_ethernet in device_group.get('ethernet', []):
+            if ethernet is None or ixn_ethernet['name'] != ethernet.name:
+                hrefs.append(ixn_ethernet['href'])
+                continue
+            for ixn_ipv4 in ixn_ethernet.get('ipv4', []):
+                if ipv4 is None or ixn_ipv4['name'] != ipv4.name:
+                    hrefs.append(ixn_ipv4['href'])
+                    continue
+                for ixn_bgpv4 in ixn_ipv4.get('bgpIpv4Peer', []):
+                    if bgpv4 is None or ixn_bgpv4['name'] != bgpv4.name:
+                        hrefs.append(ixn_bgpv4['href'])
+            for ixn_ipv6 in ixn_ethernet.get('ipv6', []):
+                if ipv6 is None or ixn_ipv6['name'] != ipv6.name:
+                    hrefs.append(ixn_ipv6['href'])
+
+    def _configure_topology(self, topologies, devices):
+        """One /topology for every unique device.container_name
+        Topology name is device.container_name
+        """
+        vports = self._api.select_vports()
+        topology_xpaths = {}
+        device_group_indexes = {}
+        topology_index = self._get_last_index(topologies.values())
+        for device in devices:
+            name = self._api._get_topology_name(device.container_name)
+            topology = topologies.get(name)
+            if name not in topology_xpaths:
+                if topology is not None:
+                    xpath = topology['xpath']
+                else:
+                    topology_index += 1
+                    xpath = '/topology[%s]' % topology_index
+                topology_xpaths[name] = xpath
+                device_group_indexes[name] = 0 if topology is None else self._get_last_index(
+                    topology.get('deviceGroup', []))
+                self._imports.append({
+                    'xpath': xpath,
+                    'name': name,
+                    'vports': [vports[device.container_name]['xpath']]
+                })
+            ixn_device_group = None
+            if topology is not None:
+                ixn_device_group = self._find(topology.get('deviceGroup', []),
+                                              device.name)
+            if ixn_device_group is None:
+                device_group_indexes[name] += 1
+                ixn_device_group = {
+                    'xpath': '%s/deviceGroup[%s]' % (
+                        topology_xpaths[name], device_group_indexes[name])
+                }
+            self._configure_device_group(ixn_device_group, device)
+
+    def _get_last_index(self, ixn_objects):
+        """Return the highest xpath index of the selected objects.
+        Xpath indexes are object ids that are not contiguous once objects
+        have been removed so new objects are created above the highest id.
+        """
+        last_index = 0
+        for ixn_object in ixn_objects:
+            index = int(ixn_object['xpath'].rsplit('[', 1)[1].rstrip(']'))
+            last_index = max(last_index, index)
+        return last_index
+
+    def _configure_device_group(self, ixn_device_group, device):
+        """Transform /components/schemas/Device into /topology/deviceGroup
+        One /topology/deviceGroup for every device in port.devices
+        """
+        xpath = ixn_device_group['xpath']
+        self._device_count = device.device_count
+        self._imports.append({
+            'xpath': xpath,
+            'name': device.name,
+            'multiplier': device.device_count
+        })
+        ethernet, ipv4, ipv6, bgpv4 = self._get_stack(device)
+        if ethernet is None:
+            return
+        ixn_ethernet = self._existing(ixn_device_group, 'ethernet',
+                                      xpath + '/ethernet[1]')
+        self._configure_ethernet(ixn_ethernet, ethernet)
+        if ipv4 is not None:
+            ixn_ipv4 = self._existing(ixn_ethernet, 'ipv4',
+                                      ixn_ethernet['xpath'] + '/ipv4[1]')
+            self._configure_ipv4(ixn_ipv4, ipv4)
+            if bgpv4 is not None:
+                ixn_bgpv4 = self._existing(
+                    ixn_ipv4, 'bgpIpv4Peer',
+                    ixn_ipv4['xpath'] + '/bgpIpv4Peer[1]')
+                self._configure_bgpv4(ixn_bgpv4, bgpv4)
+                self._configure_route_ranges(ixn_device_group, bgpv4)
+        if ipv6 is not None:
+            ixn_ipv6 = self._existing(ixn_ethernet, 'ipv6',
+                                      ixn_ethernet['xpath'] + '/ipv6[1]')
+            self._configure_ipv6(ixn_ipv6, ipv6)
 
-    def _configure_pattern(self, ixn_obj, pattern, enum_map=None):
+    def _existing(self, ixn_parent, child, xpath):
+        """Return the existing selected child or a new child with the xpath
+        """
+        if len(ixn_parent.get(child, [])) > 0:
+            return ixn_parent[child][0]
+        return {'xpath': xpath}
+
+    def _multivalue(self, xpath, attribute):
+        return "/multivalue[@source = '%s %s']" % (xpath, attribute)
+
+    def _configure_pattern(self, xpath, attribute, pattern, enum_map=None):
+        """Add the multivalue import of a pattern to the imports
+
+        Counter and random patterns use the native increment and random
+        range generators so that the size of the import does not depend on
+        the device count.
+        """
         if pattern is None:
             return
-        elif enum_map is not None and pattern.fixed is not None:
-            ixn_obj.Single(enum_map[pattern.fixed])
+        multivalue = self._multivalue(xpath, attribute)
+        if enum_map is not None and pattern.fixed is not None:
+            self._imports.append({
+                'xpath': multivalue + '/singleValue',
+                'value': enum_map[pattern.fixed]
+            })
         elif pattern.choice == 'fixed':
-            ixn_obj.Single(pattern.fixed)
+            self._imports.append({
+                'xpath': multivalue + '/singleValue',
+                'value': pattern.fixed
+            })
         elif pattern.choice == 'list':
-            ixn_obj.ValueList(pattern.list)
+            self._configure_list(multivalue, pattern.list)
         elif pattern.choice == 'counter':
-            pass
+            up = getattr(pattern.counter, 'up', True)
+            self._imports.append({
+                'xpath': multivalue + '/counter',
+                'start': pattern.counter.start,
+                'step': pattern.counter.step,
+                'direction': 'decrement' if up is False else 'increment'
+            })
         elif pattern.choice == 'random':
+            random = {
+                'xpath': multivalue + '/repeatableRandomRange',
+                'min': pattern.random.min,
+                'max': pattern.random.max,
+                'step': pattern.random.step
+            }
+            if getattr(pattern.random, 'seed', None) is not None:
+                random['seed'] = pattern.random.seed
+            self._imports.append(random)
+
+    def _configure_list(self, multivalue, values):
+        """Add a list pattern to the imports using the most compact
+        multivalue pattern that produces the same values.
+
+        A valueList repeats when it is shorter than the device count so a
+        plain counter is only used when the list covers every device.
+        """
+        form = self._optimizer.optimize(values)
+        covers = len(values) >= self._device_count
+        if form is None:
             pass
+        elif form['choice'] == 'single':
+            self._imports.append({
+                'xpath': multivalue + '/singleValue',
+                'value': form['value']
+            })
+            return
+        elif form['choice'] == 'counter' and form['count'] == len(
+                values) and covers is True:
+            self._imports.append({
+                'xpath': multivalue + '/counter',
+                'start': form['start'],
+                'step': form['step'],
+                'direction': 'increment' if form['up'] is True else 'decrement'
+            })
+            return
+        elif form['choice'] == 'counter' and form['up'] is True:
+            self._configure_custom(multivalue, form['start'],
+                                   self._optimizer.zero(form['start']),
+                                   form['step'], form['count'])
+            return
+        elif form['choice'] == 'nested' and covers is True:
+            self._configure_custom(multivalue, form['start'],
+                                   form['outer_step'], form['inner_step'],
+                                   form['inner_count'])
+            return
+        self._imports.append({
+            'xpath': multivalue + '/valueList',
+            'values': values
+        })
+
+    def _configure_custom(self, multivalue, start, step, increment, count):
+        """Runs of count values that increment by increment, every run
+        starting step after the previous run
+        """
+        self._imports.append({
+            'xpath': multivalue + '/custom',
+            'start': start,
+            'step': step
+        })
+        self._imports.append({
+            'xpath': multivalue + '/custom/increment[1]',
+            'value': increment,
+            'count': count
+        })
 
     def _configure_ethernet(self, ixn_ethernet, ethernet):
         """Transform Device.Ethernet to /topology/.../ethernet
         """
-        self._api._remove(ixn_ethernet, [ethernet])
+        xpath = ixn_ethernet['xpath']
         args = {
-            'Name': ethernet.name,
+            'xpath': xpath,
+            'name': ethernet.name,
         }
-        ixn_ethernet.find(Name='^%s$' % ethernet.name)
-        if len(ixn_ethernet) == 0:
-            ixn_ethernet.add(**args)
-        else:
-            self._update(ixn_ethernet, **args)
-        self._api.ixn_objects[ethernet.name] = ixn_ethernet.href
-        self._configure_pattern(ixn_ethernet.Mac, ethernet.mac)
-        self._configure_pattern(ixn_ethernet.Mtu, ethernet.mtu)
         if ethernet.vlans is not None:
-            ixn_ethernet.VlanCount = len(ethernet.vlans)
-            ixn_ethernet.EnableVlans.Single(ixn_ethernet.VlanCount > 0)
-            self._configure_vlan(ixn_ethernet.Vlan, ethernet.vlans)
-        return ixn_ethernet
+            args['vlanCount'] = len(ethernet.vlans)
+        self._imports.append(args)
+        if ethernet.vlans is not None:
+            self._imports.append({
+                'xpath': self._multivalue(xpath, 'enableVlans') + '/singleValue',
+                'value': len(ethernet.vlans) > 0
+            })
+        self._configure_pattern(xpath, 'mac', ethernet.mac)
+        self._configure_pattern(xpath, 'mtu', ethernet.mtu)
+        if ethernet.vlans is not None:
+            self._configure_vlan(xpath, ethernet.vlans)
 
-    def _configure_vlan(self, ixn_vlans, vlans):
+    def _configure_vlan(self, ethernet_xpath, vlans):
         """Transform Device.Vlan to /topology/.../vlan
         """
-        for i in range(0, len(ixn_vlans.find())):
-            args = {'Name': vlans[i].name}
-            ixn_vlan = ixn_vlans[i]
-            self._update(ixn_vlan, **args)
-            self._api.ixn_objects[vlans[i].name] = ixn_vlan.href
-            self._configure_pattern(ixn_vlan.VlanId, vlans[i].id)
-            self._configure_pattern(ixn_vlan.Priority, vlans[i].priority)
-            self._configure_pattern(ixn_vlan.Tpid,
+        for i in range(0, len(vlans)):
+            xpath = '%s/vlan[%s]' % (ethernet_xpath, i + 1)
+            self._imports.append({'xpath': xpath, 'name': vlans[i].name})
+            self._configure_pattern(xpath, 'vlanId', vlans[i].id)
+            self._configure_pattern(xpath, 'priority', vlans[i].priority)
+            self._configure_pattern(xpath,
+                                    'tpid',
                                     vlans[i].tpid,
                                     enum_map=Ngpf._TPID_MAP)
 
     def _configure_ipv4(self, ixn_ipv4, ipv4):
         """Transform Device.Ipv4 to /topology/.../ipv4
         """
-        self._api._remove(ixn_ipv4, [ipv4])
-        args = {
-            'Name': ipv4.name,
-        }
-        ixn_ipv4.find(Name='^%s$' % ipv4.name)
-        if len(ixn_ipv4) == 0:
-            ixn_ipv4.add(**args)[-1]
-        else:
-            self._update(ixn_ipv4, **args)
-        self._api.ixn_objects[ipv4.name] = ixn_ipv4.href
-        self._configure_pattern(ixn_ipv4.Address, ipv4.address)
-        self._configure_pattern(ixn_ipv4.GatewayIp, ipv4.gateway)
-        self._configure_pattern(ixn_ipv4.Prefix, ipv4.prefix)
-        return ixn_ipv4
+        xpath = ixn_ipv4['xpath']
+        self._imports.append({'xpath': xpath, 'name': ipv4.name})
+        self._configure_pattern(xpath, 'address', ipv4.address)
+        self._configure_pattern(xpath, 'gatewayIp', ipv4.gateway)
+        self._configure_pattern(xpath, 'prefix', ipv4.prefix)
 
     def _configure_ipv6(self, ixn_ipv6, ipv6):
-        self._api._remove(ixn_ipv6, [ipv6])
-        args = {
-            'Name': ipv6.name,
-        }
-        ixn_ipv6.find(Name='^%s$' % ipv6.name)
-        if len(ixn_ipv6) == 0:
-            ixn_ipv6.add(**args)[-1]
-        else:
-            self.update(ixn_ipv6, **args)
-        self._api.ixn_objects[ipv6.name] = ixn_ipv6.href
-        self._configure_pattern(ixn_ipv6.Address, ipv6.address)
-        self._configure_pattern(ixn_ipv6.GatewayIp, ipv6.gateway)
-        self._configure_pattern(ixn_ipv6.Prefix, ipv6.prefix)
-        return ipv6
+        """Transform Device.Ipv6 to /topology/.../ipv6
+        """
+        xpath = ixn_ipv6['xpath']
+        self._imports.append({'xpath': xpath, 'name': ipv6.name})
+        self._configure_pattern(xpath, 'address', ipv6.address)
+        self._configure_pattern(xpath, 'gatewayIp', ipv6.gateway)
+        self._configure_pattern(xpath, 'prefix', ipv6.prefix)
 
     def _configure_bgpv4(self, ixn_bgpv4, bgpv4):
-        self._api._remove(ixn_bgpv4, [bgpv4])
-        args = {
-            'Name': bgpv4.name,
+        """Transform Device.Bgpv4 to /topology/.../bgpIpv4Peer
+        """
+        self._imports.append({
+            'xpath': ixn_bgpv4['xpath'],
+            'name': bgpv4.name
+        })
+
+    def _configure_route_ranges(self, ixn_device_group, bgpv4):
+        """Transform Device.Bgpv4RouteRange to /topology/.../networkGroup
+        One networkGroup per route range with one ipv4PrefixPools of
+        route_count_per_device networks per device.
+
+        The networks of a pool are generated by the pool itself so the size
+        of the import only depends on the number of route ranges.
+        """
+        ixn_network_groups = ixn_device_group.get('networkGroup', [])
+        index = self._get_last_index(ixn_network_groups)
+        route_ranges, route_count = self._get_route_ranges(bgpv4)
+        for route_range in route_ranges:
+            ixn_network_group = self._find(ixn_network_groups, route_range.name)
+            if ixn_network_group is None:
+                index += 1
+                ixn_network_group = {
+                    'xpath': '%s/networkGroup[%s]' % (ixn_device_group['xpath'], index)
+                }
+            self._imports.append({
+                'xpath': ixn_network_group['xpath'],
+                'name': route_range.name,
+                'multiplier': 1
+            })
+            xpath = ixn_network_group['xpath'] + '/ipv4PrefixPools[1]'
+            self._imports.append({
+                'xpath': xpath,
+                'numberOfAddresses': int(route_count)
+            })
+            self._imports.append({
+                'xpath': self._multivalue(xpath, 'prefixAddrStep') + '/singleValue',
+                'value': 1
+            })
+            self._configure_pattern(xpath, 'prefixLength', route_range.prefix)
+            self._configure_network_address(xpath, route_range, int(route_count))
+            property_xpath = xpath + '/bgpIPRouteProperty[1]'
+            self._imports.append({'xpath': property_xpath})
+            next_hop = route_range.next_hop_address
+            if next_hop is not None:
+                self._imports.append({
+                    'xpath': self._multivalue(property_xpath, 'nextHopType') + '/singleValue',
+                    'value': 'manually'
+                })
+                self._configure_pattern(property_xpath, 'ipv4NextHop', next_hop)
+
+    def _configure_network_address(self, xpath, route_range, route_count):
+        """A fixed address is the first network of the first device.
+        Every following device starts route_count networks after the
+        previous device using a counter so that the pools do not overlap.
+        """
+        address = route_range.address
+        prefix = route_range.prefix
+        if address is None or address.choice != 'fixed' or self._device_count < 2 \
+                or prefix is None or prefix.choice != 'fixed':
+            self._configure_pattern(xpath, 'networkAddress', address)
+            return
+        step = route_count << (32 - int(prefix.fixed))
+        self._imports.append({
+            'xpath': self._multivalue(xpath, 'networkAddress') + '/counter',
+            'start': address.fixed,
+            'step': '.'.join([str((step >> shift) & 0xff) for shift in (24, 16, 8, 0)]),
+            'direction': 'increment'
+        })
+
+    def _register_objects(self, topologies):
+        """Register the href of every object in the /topology tree
+        """
+        for topology in topologies.values():
+            self._api.ixn_objects[topology['name']] = topology['href']
+            for device_group in topology.get('deviceGroup', []):
+                self._register_object(device_group)
+                self._register_slices(device_group)
+
+    def _register_slices(self, device_group):
+        """Every device of a folded device group is the slice of one index.
+        All devices share the device group href in ixn_objects.
+        """
+        for i, device in enumerate(self._folded.get(device_group['name'], [])):
+            self._slices[device.name] = (device_group['href'], i + 1, 1)
+            self._api.ixn_objects[device.name] = device_group['href']
+
+    def _register_object(self, ixn_object):
+        if ixn_object['name'] in self._api._config_objects:
+            self._api.ixn_objects[ixn_object['name']] = ixn_object['href']
+        for child in Ngpf._STACK_CHILDREN:
+            for ixn_child in ixn_object.get(child, []):
+                self._register_object(ixn_child)
+
+    def _set_result_value(self,
+                          row,
+                          column_name,
+                          column_value,
+                          column_type=str):
+        if len(self._column_names
+               ) > 0 and column_name not in self._column_names:
+            return
+        try:
+            row[column_name] = column_type(column_value)
+        except:
+            if column_type.__name__ in ['float', 'int']:
+                row[column_name] = 0
+            else:
+                row[column_name] = column_value
+
+    def _is_requested(self, column_names):
+        if len(self._column_names) == 0:
+            return True
+        return len(set(column_names) & set(self._column_names)) > 0
+
+    def _select_results(self, device_names):
+        """Select the session state of every requested device group in one select
+        Only the properties needed by the requested columns are selected
+        """
+        stack_properties = ['name']
+        if self._is_requested(Ngpf._SESSION_COLUMNS.keys()) is True:
+            stack_properties.append('stateCounts')
+            if len(self._folded) > 0:
+                stack_properties.append('sessionStatus')
+        ip_properties = list(stack_properties)
+        if self._is_requested(['gateways_resolved',
+                               'gateways_unresolved']) is True:
+            ip_properties.append('resolvedGatewayMac')
+        filters = []
+        if device_names is not None and len(device_names) > 0:
+            device_group_names = []
+            for name in device_names:
+                name = self.get_device_group_name(name)
+                if name not in device_group_names:
+                    device_group_names.append(name)
+            filters.append({
+                'property':
+                'name',
+                'regex':
+                '^(%s)$' % '|'.join([re.escape(name) for name in device_group_names])
+            })
+        payload = {
+            'selects': [{
+                'from':
+                '/',
+                'properties': [],
+                'children': [{
+                    'child': 'topology',
+                    'properties': ['name'],
+                    'filters': []
+                }, {
+                    'child': 'deviceGroup',
+                    'properties': ['name'],
+                    'filters': filters
+                }, {
+                    'child': 'ethernet',
+                    'properties': stack_properties,
+                    'filters': []
+                }, {
+                    'child': '^(ipv4|ipv6)$',
+                    'properties': ip_properties,
+                    'filters': []
+                }, {
+                    'child': 'bgpIpv4Peer',
+                    'properties': stack_properties,
+                    'filters': []
+                }],
+                'inlines': []
+            }]
         }
-        ixn_bgpv4.find(Name='^%s$' % bgpv4.name)
-        if len(ixn_bgpv4) == 0:
-            ixn_bgpv4.add(**args)[-1]
+        url = '%s/operations/select?xpath=true' % self._api._ixnetwork.href
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        device_groups = []
+        for topology in results[0].get('topology', []):
+            device_groups.extend(topology.get('deviceGroup', []))
+        return device_groups
+
+    def _get_stack_node(self, ixn_device_group, node):
+        """Return the first selected node of the device group protocol stack
+        """
+        for ixn_ethernet in ixn_device_group.get('ethernet', []):
+            if node == 'ethernet':
+                return ixn_ethernet
+            for ip in ['ipv4', 'ipv6']:
+                for ixn_ip in ixn_ethernet.get(ip, []):
+                    if node == ip:
+                        return ixn_ip
+                    for ixn_bgpv4 in ixn_ip.get('bgpIpv4Peer', []):
+                        if node == 'bgpIpv4Peer':
+                            return ixn_bgpv4
+        return None
+
+    def results(self, request):
+        """Return device results
+
+        One row per device with the session state of the top protocol of the
+        device, the gateway resolution counts of its ipv4/ipv6 stack and for
+        bgpv4 devices the routes of the 'BGP Peer Per Port' view of its port.
+        The state of a folded device is its slice of the per index session
+        status and resolved gateways of the folded device group.
+        """
+        if request.column_names is None:
+            self._column_names = []
         else:
-            self._update(ixn_bgpv4, **args)
-        self._api.ixn_objects[bgpv4.name] = ixn_bgpv4.href
+            self._column_names = request.column_names
+        device_rows = {}
+        bgpv4_ports = {}
+        device_names = getattr(request, 'device_names', None)
+        for ixn_device_group in self._select_results(device_names):
+            if ixn_device_group['name'] in self._folded:
+                devices = self._folded[ixn_device_group['name']]
+                if device_names is not None and len(device_names) > 0:
+                    devices = [
+                        device for device in devices
+                        if device.name in device_names
+                    ]
+            else:
+                devices = [
+                    self._api.get_config_object_from_href(
+                        ixn_device_group['href'])
+                ]
+            for device in devices:
+                if device is None or getattr(device, 'choice', None) not in Ngpf._DEVICE_STACK:
+                    continue
+                device_row = {}
+                self._set_result_value(device_row, 'name', device.name)
+                self._set_result_value(device_row, 'port', device.container_name)
+                self._set_result_value(device_row, 'protocol', device.choice)
+                device_slice = self.get_device_slice(device.name)
+                ixn_node = self._get_stack_node(ixn_device_group,
+                                                Ngpf._DEVICE_STACK[device.choice])
+                state_counts = {}
+                if ixn_node is not None and device_slice is not None:
+                    state_counts = self._get_slice_state_counts(
+                        ixn_node.get('sessionStatus'), device_slice)
+                elif ixn_node is not None and ixn_node.get('stateCounts') is not None:
+                    state_counts = ixn_node['stateCounts']
+                for column_name, key in Ngpf._SESSION_COLUMNS.items():
+                    self._set_result_value(device_row, column_name,
+                                           state_counts.get(key, 0), int)
+                self._set_gateway_results(device_row, ixn_device_group,
+                                          device_slice)
+                if device.choice == 'bgpv4':
+                    bgpv4_ports.setdefault(device.container_name,
+                                           []).append(device_row)
+                device_rows[device.name] = device_row
+        self._set_route_results(bgpv4_ports)
+        return device_rows.values()
+
+    def _get_slice(self, values, device_slice):
+        if values is None:
+            return []
+        if device_slice is None:
+            return values
+        href, start, count = device_slice
+        return values[start - 1:start - 1 + count]
+
+    def _get_slice_state_counts(self, session_status, device_slice):
+        session_status = self._get_slice(session_status, device_slice)
+        state_counts = {'total': len(session_status)}
+        for status in session_status:
+            state_counts[status] = state_counts.get(status, 0) + 1
+        return state_counts
+
+    def _set_gateway_results(self, device_row, ixn_device_group, device_slice):
+        if self._is_requested(['gateways_resolved',
+                               'gateways_unresolved']) is False:
+            return
+        resolved = unresolved = 0
+        for ip in ['ipv4', 'ipv6']:
+            ixn_ip = self._get_stack_node(ixn_device_group, ip)
+            if ixn_ip is None or ixn_ip.get('resolvedGatewayMac') is None:
+                continue
+            for mac in self._get_slice(ixn_ip['resolvedGatewayMac'], device_slice):
+                if mac.lower().startswith('unresolved'):
+                    unresolved += 1
+                else:
+                    resolved += 1
+        self._set_result_value(device_row, 'gateways_resolved', resolved, int)
+        self._set_result_value(device_row, 'gateways_unresolved', unresolved,
+                               int)
+
+    def _set_route_results(self, bgpv4_ports):
+        """Routes are only available per port so every bgpv4 device on a
+        port reports the routes of that port
+        """
+        if len(bgpv4_ports) == 0 or self._is_requested(
+                Ngpf._ROUTE_CAPTIONS.keys()) is False:
+            return
+        try:
+            table = self._api.assistant.StatViewAssistant('BGP Peer Per Port')
+            for row in table.Rows:
+                for device_row in bgpv4_ports.get(row['Port'], []):
+                    for column_name, caption in Ngpf._ROUTE_CAPTIONS.items():
+                        self._set_result_value(device_row, column_name,
+                                               row[caption], int)
+        except Exception as e:
+            self._api.add_error(e)
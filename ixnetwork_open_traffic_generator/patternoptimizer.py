@@ -0,0 +1,181 @@
+try:
+    _STRING_TYPES = (str, unicode)
+except NameError:
+    _STRING_TYPES = (str, )
+
+
+class PatternOptimizer(object):
+    """Find a compact arithmetic form of a list pattern
+
+    Value lists of integers, IPv4, IPv6 or MAC addresses are parsed into
+    integers and checked for the following forms:
+
+    - single: every value is the same
+    - counter: the list is an arithmetic progression of count values that
+      is repeated to fill the list (count equals the length of the list
+      when it is not repeated)
+    - nested: the list is outer_count runs of an arithmetic progression of
+      inner_count values and every run starts outer_step after the previous
+
+    The list is treated as a cycle of len(list) values which is how both
+    /multivalue valueList and /traffic/.../field valueList use it.
+    Steps are formatted in the same notation as the values.
+    """
+    def __init__(self, min_length=3):
+        self._min_length = min_length
+
+    def optimize(self, values):
+        """Return a dict describing the compact form of the values or None
+        if there is no compact form
+
+        - {'choice': 'single', 'value': v}
+        - {'choice': 'counter', 'start': v, 'step': s, 'up': bool, 'count': n}
+        - {'choice': 'nested', 'start': v, 'inner_step': s, 'inner_count': n,
+           'outer_step': s, 'outer_count': n}
+        """
+        if values is None or len(values) < self._min_length:
+            return None
+        kind = self._get_kind(values[0])
+        if kind is None:
+            return None
+        try:
+            numbers = [self._parse(kind, value) for value in values]
+        except (ValueError, TypeError):
+            return None
+        count = len(numbers)
+        if numbers.count(numbers[0]) == count:
+            return {'choice': 'single', 'value': values[0]}
+        period = self._get_period(numbers)
+        if period is not None and self._is_progression(numbers, 0, period):
+            step = numbers[1] - numbers[0]
+            return {
+                'choice': 'counter',
+                'start': values[0],
+                'step': self._format(kind, abs(step), values[0]),
+                'up': step > 0,
+                'count': period
+            }
+        return self._get_nested(kind, values, numbers)
+
+    def zero(self, value):
+        """Return a zero step in the same notation as the value
+        """
+        kind = self._get_kind(value)
+        if kind is None:
+            return None
+        return self._format(kind, 0, value)
+
+    def _get_kind(self, value):
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return 'int'
+        if not isinstance(value, _STRING_TYPES):
+            return None
+        if value.isdigit():
+            return 'int'
+        if value.count('.') == 3:
+            return 'ipv4'
+        if len(value) == 17 and value.count(':') == 5:
+            return 'mac'
+        if ':' in value:
+            return 'ipv6'
+        return None
+
+    def _parse(self, kind, value):
+        if kind == 'int':
+            if isinstance(value, _STRING_TYPES) and not value.isdigit():
+                raise ValueError(value)
+            return int(value)
+        if kind == 'ipv4':
+            octets = [int(octet) for octet in value.split('.')]
+            if len(octets) != 4 or max(octets) > 255 or min(octets) < 0:
+                raise ValueError(value)
+            return (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3]
+        if kind == 'mac':
+            if len(value) != 17 or value.count(':') != 5:
+                raise ValueError(value)
+            return int(value.replace(':', ''), 16)
+        if kind == 'ipv6':
+            if value.count('::') > 1:
+                raise ValueError(value)
+            if '::' in value:
+                head, tail = value.split('::')
+                head = head.split(':') if len(head) > 0 else []
+                tail = tail.split(':') if len(tail) > 0 else []
+                groups = head + ['0'] * (8 - len(head) - len(tail)) + tail
+            else:
+                groups = value.split(':')
+            if len(groups) != 8:
+                raise ValueError(value)
+            number = 0
+            for group in groups:
+                number = (number << 16) | int(group, 16)
+            return number
+        raise ValueError(value)
+
+    def _format(self, kind, number, sample):
+        if kind == 'int':
+            return number if isinstance(sample, int) else str(number)
+        if kind == 'ipv4':
+            return '.'.join(
+                [str((number >> shift) & 0xff) for shift in (24, 16, 8, 0)])
+        if kind == 'mac':
+            digits = '%012x' % number
+            return ':'.join([digits[i:i + 2] for i in range(0, 12, 2)])
+        return ':'.join([
+            '%x' % ((number >> shift) & 0xffff)
+            for shift in range(112, -16, -16)
+        ])
+
+    def _get_period(self, numbers):
+        """Return the smallest period that divides the list length
+        """
+        count = len(numbers)
+        period = count
+        for i in range(1, count):
+            if numbers[i] == numbers[0] and count % i == 0:
+                period = i
+                break
+        for i in range(period, count):
+            if numbers[i] != numbers[i - period]:
+                return count
+        return period
+
+    def _is_progression(self, numbers, start, length):
+        if length < 2:
+            return False
+        step = numbers[start + 1] - numbers[start]
+        if step == 0:
+            return False
+        for i in range(start + 2, start + length):
+            if numbers[i] - numbers[i - 1] != step:
+                return False
+        return True
+
+    def _get_nested(self, kind, values, numbers):
+        """Detect outer_count runs of inner_count values each
+        """
+        count = len(numbers)
+        inner_step = numbers[1] - numbers[0]
+        inner_count = count
+        for i in range(2, count):
+            if numbers[i] - numbers[i - 1] != inner_step:
+                inner_count = i
+                break
+        if inner_count < 2 or inner_count == count or count % inner_count != 0:
+            return None
+        outer_step = numbers[inner_count] - numbers[0]
+        for i in range(inner_count, count):
+            if numbers[i] - numbers[i - inner_count] != outer_step:
+                return None
+        if inner_step <= 0 or outer_step <= 0:
+            return None
+        return {
+            'choice': 'nested',
+            'start': values[0],
+            'inner_step': self._format(kind, inner_step, values[0]),
+            'inner_count': inner_count,
+            'outer_step': self._format(kind, outer_step, values[0]),
+            'outer_count': count // inner_count
+        }
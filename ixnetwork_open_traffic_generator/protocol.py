@@ -0,0 +1,493 @@
+import time
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ixnetwork_restpy.connection import Connection
+
+
+class Protocol(object):
+    """Protocol lifecycle of /topology and /topology/deviceGroup
+
+    The status of every topology and device group is read with one select.
+    Only topologies and device groups that are not started are started and
+    every topology is started concurrently.
+
+    Every topology is controlled by its own future so that the caller can
+    wait for the topologies of some devices while the remaining topologies
+    are still starting. A restpy connection is not thread safe so every
+    worker thread uses its own connection to the session.
+
+    Args
+    ----
+    - ixnetworkapi (IxNetworkApi): instance of the ixnetworkapi class
+    - max_workers (int): The maximum number of topologies controlled concurrently
+    - gateway_timeout (int): Seconds to wait for gateways to resolve
+    - gateway_errors (bool): Raise an error if gateways are not resolved
+        within gateway_timeout, if False log a warning instead
+    """
+    _RESOLVE_OPERATIONS = {
+        'ipv4': 'topology/deviceGroup/ethernet/ipv4/operations/sendarp',
+        'ipv6': 'topology/deviceGroup/ethernet/ipv6/operations/sendns'
+    }
+
+    _EXPECTED_STATUS = {
+        'start': 'started',
+        'stop': 'notStarted'
+    }
+
+    def __init__(self,
+                 ixnetworkapi,
+                 max_workers=16,
+                 gateway_timeout=30,
+                 gateway_errors=True):
+        self._api = ixnetworkapi
+        self._max_workers = max_workers
+        self._gateway_timeout = gateway_timeout
+        self._gateway_errors = gateway_errors
+        self._executor = None
+        self._futures = {}
+        self._resolution_times = {}
+        self._local = threading.local()
+
+    @property
+    def resolution_times(self):
+        """A dict of device names to the seconds it took the gateways of
+        the device to resolve during the last resolve_gateways
+        """
+        return self._resolution_times
+
+    @property
+    def futures(self):
+        """A dict of topology names to the future of the last start or stop
+        of that topology
+        """
+        return self._futures
+
+    def select_status(self, topology_names=None):
+        """Select the name and status of all topologies and device groups.
+        Return the topologies in a dict keyed by topology name.
+        """
+        return self._select_status(topology_names, self._api._ixnetwork._connection)
+
+    def _select_status(self, topology_names, connection):
+        filters = []
+        if topology_names is not None and len(topology_names) > 0:
+            filters.append({
+                'property':
+                'name',
+                'regex':
+                '^(%s)$' % '|'.join([re.escape(name) for name in topology_names])
+            })
+        payload = {
+            'selects': [{
+                'from':
+                '/',
+                'properties': [],
+                'children': [{
+                    'child': 'topology',
+                    'properties': ['name', 'status'],
+                    'filters': filters
+                }, {
+                    'child': 'deviceGroup',
+                    'properties': ['name', 'status'],
+                    'filters': []
+                }],
+                'inlines': []
+            }]
+        }
+        url = '%s/operations/select?xpath=true' % self._api._ixnetwork.href
+        results = connection._execute(url, payload)
+        topologies = {}
+        for topology in results[0].get('topology', []):
+            topologies[topology['name']] = topology
+        return topologies
+
+    def start(self):
+        """Start every topology and device group that is not started
+        Return True if anything was started
+        """
+        return self._wait_all('start', self.start_async())
+
+    def stop(self):
+        """Stop every topology and device group that is not stopped
+        Return True if anything was stopped
+        """
+        return self._wait_all('stop', self.stop_async())
+
+    def _wait_all(self, operation, futures):
+        if len(futures) == 0:
+            self._api.info('protocols already %s' %
+                           Protocol._EXPECTED_STATUS[operation])
+            return False
+        start = time.time()
+        for future in futures.values():
+            future.result()
+        self._api.info('protocols %s %ssecs' % (operation, str(time.time() - start)))
+        return True
+
+    def start_async(self, device_names=None, progress=None, timeout=120):
+        """Start the topologies and device groups that are not started
+        without waiting for them
+
+        Args
+        ----
+        - device_names (list(str)): Only start the device groups of these devices
+        - progress (callable(str, dict)): Called with the topology name and
+            the topology status every time the status of a starting topology
+            is polled
+        - timeout (int): Seconds after which the future of a topology that
+            has not started raises a RuntimeError
+
+        Return a dict of topology names to the futures of the topologies
+        that are starting. Topologies that are already being started or
+        stopped are not started again.
+        """
+        return self._control_async('start', device_names, progress, timeout)
+
+    def stop_async(self, device_names=None, progress=None, timeout=120):
+        """Stop the topologies and device groups that are not stopped
+        without waiting for them, see start_async
+        """
+        return self._control_async('stop', device_names, progress, timeout)
+
+    def wait(self, topology_names=None, timeout=None):
+        """Wait for the pending start or stop of the topologies
+        Raises the error of the first topology that failed
+        """
+        for name, future in list(self._futures.items()):
+            if topology_names is None or name in topology_names:
+                future.result(timeout=timeout)
+
+    def close(self):
+        """Wait for every pending operation and release the worker threads
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._futures = {}
+
+    def _control_async(self, operation, device_names, progress, timeout):
+        expected = Protocol._EXPECTED_STATUS[operation]
+        device_group_names = None
+        if device_names is not None and len(device_names) > 0:
+            device_group_names = [
+                self._api.ngpf.get_device_group_name(name)
+                for name in device_names
+            ]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        futures = {}
+        for topology in self.select_status().values():
+            name = topology['name']
+            pending = self._futures.get(name)
+            if pending is not None and pending.done() is False:
+                continue
+            device_groups = [
+                device_group for device_group in topology.get('deviceGroup', [])
+                if device_group_names is None or device_group['name'] in device_group_names
+            ]
+            hrefs = [
+                device_group['href'] for device_group in device_groups
+                if device_group['status'] != expected
+            ]
+            if len(hrefs) == 0:
+                continue
+            if len(hrefs) == len(topology.get('deviceGroup', [])):
+                node, hrefs = 'topology', [topology['href']]
+            else:
+                node = 'topology/deviceGroup'
+            futures[name] = self._executor.submit(self._control, operation,
+                                                  name, node, hrefs, progress,
+                                                  timeout)
+            self._futures[name] = futures[name]
+        return futures
+
+    def _control(self, operation, name, node, hrefs, progress, timeout):
+        """Execute the operation on the hrefs of one topology and poll the
+        status of the topology until every device group has the expected
+        status
+        """
+        start = time.time()
+        connection = self._get_connection()
+        url = '%s/%s/operations/%s' % (self._api._ixnetwork.href, node,
+                                        operation)
+        connection._execute(url, {'arg1': hrefs})
+        expected = Protocol._EXPECTED_STATUS[operation]
+        while True:
+            topology = self._select_status([name], connection).get(name, {})
+            if progress is not None:
+                progress(name, topology)
+            statuses = [
+                device_group['status']
+                for device_group in topology.get('deviceGroup', [])
+                if device_group['href'] in hrefs or node == 'topology'
+            ]
+            if len([status for status in statuses if status != expected]) == 0:
+                break
+            if time.time() - start > timeout:
+                raise RuntimeError('After %s seconds, %s did not %s' %
+                                   (timeout, name, operation))
+            time.sleep(1)
+        elapsed = time.time() - start
+        self._api.info('%s %s %ssecs' % (name, operation, str(elapsed)))
+        return elapsed
+
+    def _get_connection(self):
+        """Return the connection of the current worker thread to the session,
+        created with the address and api key of the session connection
+        """
+        session = self._api._ixnetwork._connection
+        key = (session._hostname, session._rest_port, session.x_api_key)
+        if getattr(self._local, 'key', None) != key:
+            connection = Connection(session._hostname,
+                                    session._rest_port,
+                                    None,
+                                    verify_cert=session._verify_cert,
+                                    trace=session.trace,
+                                    script_watch='SDMAPI' not in session._headers,
+                                    url_prefix=session._url_prefix)
+            connection.x_api_key = session.x_api_key
+            self._local.key = key
+            self._local.connection = connection
+        return self._local.connection
+
+    def get_endpoint_topologies(self, flow_names=None):
+        """Return the names of the topologies of the device endpoints of the flows
+        """
+        topology_names = []
+        if self._api.config is None or self._api.config.flows is None:
+            return topology_names
+        for flow in self._api.config.flows:
+            if flow_names is not None and len(flow_names) > 0 and flow.name not in flow_names:
+                continue
+            if flow.tx_rx is None or flow.tx_rx.choice != 'device':
+                continue
+            for name in flow.tx_rx.device.tx_device_names + flow.tx_rx.device.rx_device_names:
+                device = self._api.get_config_object(name)
+                name = self._api._get_topology_name(device.container_name)
+                if name not in topology_names:
+                    topology_names.append(name)
+        return topology_names
+
+    def get_endpoint_devices(self, flow_names=None):
+        """Return the names of the devices with an ipv4 or ipv6 stack that
+        are endpoints of the flows
+        """
+        device_names = []
+        if self._api.config is None or self._api.config.flows is None:
+            return device_names
+        for flow in self._api.config.flows:
+            if flow_names is not None and len(flow_names) > 0 and flow.name not in flow_names:
+                continue
+            if flow.tx_rx is None or flow.tx_rx.choice != 'device':
+                continue
+            for name in flow.tx_rx.device.tx_device_names + flow.tx_rx.device.rx_device_names:
+                device = self._api.get_config_object(name)
+                if device.choice in ['ipv4', 'ipv6', 'bgpv4'] and name not in device_names:
+                    device_names.append(name)
+        return device_names
+
+    def _get_device_groups(self, device_names):
+        """Return a dict of device group names to the names of the devices
+        of the device group
+        """
+        device_groups = {}
+        for name in device_names:
+            device_groups.setdefault(self._api.ngpf.get_device_group_name(name),
+                                     []).append(name)
+        return device_groups
+
+    def _select_unresolved(self, device_names):
+        """Return a dict of device names to a list of (ip node, href) of the
+        ipv4/ipv6 stacks that have unresolved gateways using one select
+
+        The gateway of a device that is folded into a device group is the
+        resolvedGatewayMac of its slice of the device group.
+        """
+        device_groups = self._get_device_groups(device_names)
+        payload = {
+            'selects': [{
+                'from':
+                '/',
+                'properties': [],
+                'children': [{
+                    'child': 'topology',
+                    'properties': [],
+                    'filters': []
+                }, {
+                    'child':
+                    'deviceGroup',
+                    'properties': ['name'],
+                    'filters': [{
+                        'property':
+                        'name',
+                        'regex':
+                        '^(%s)$' % '|'.join([re.escape(name) for name in device_groups])
+                    }]
+                }, {
+                    'child': 'ethernet',
+                    'properties': [],
+                    'filters': []
+                }, {
+                    'child': '^(ipv4|ipv6)$',
+                    'properties': ['resolvedGatewayMac'],
+                    'filters': []
+                }],
+                'inlines': []
+            }]
+        }
+        url = '%s/operations/select?xpath=true' % self._api._ixnetwork.href
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        unresolved = {}
+        for topology in results[0].get('topology', []):
+            for device_group in topology.get('deviceGroup', []):
+                for ethernet in device_group.get('ethernet', []):
+                    for node in ['ipv4', 'ipv6']:
+                        for ip in ethernet.get(node, []):
+                            macs = ip.get('resolvedGatewayMac', [])
+                            for name in device_groups.get(device_group['name'], []):
+                                device_slice = self._api.ngpf.get_device_slice(name)
+                                device_macs = macs
+                                if device_slice is not None:
+                                    device_macs = macs[device_slice[1] - 1:
+                                                       device_slice[1] - 1 + device_slice[2]]
+                                if len([mac for mac in device_macs
+                                        if mac.lower().startswith('unresolved')]) > 0:
+                                    unresolved.setdefault(name, []).append(
+                                        (node, ip['href']))
+        return unresolved
+
+    def resolve_gateways(self, device_names, timeout=None):
+        """Wait for the gateways of the devices to resolve
+
+        The resolution state of all devices is read with one select per
+        iteration and arp/ns is only resent on the ipv4/ipv6 stacks that are
+        still unresolved. Returns as soon as every gateway is resolved.
+
+        Gateways that are not resolved after timeout seconds, by default
+        gateway_timeout, raise a RuntimeError or are logged as a warning if
+        gateway_errors is False.
+        """
+        if timeout is None:
+            timeout = self._gateway_timeout
+        self._resolution_times = {}
+        if len(device_names) == 0:
+            return
+        start = time.time()
+        pending = list(device_names)
+        first = True
+        while True:
+            unresolved = self._select_unresolved(pending)
+            elapsed = time.time() - start
+            for name in pending:
+                if name not in unresolved:
+                    self._resolution_times[name] = elapsed
+            pending = list(unresolved.keys())
+            if len(pending) == 0:
+                break
+            if elapsed > timeout:
+                message = 'After %s seconds, gateways of [%s] are not resolved' % (
+                    timeout, ', '.join(pending))
+                if self._gateway_errors is True:
+                    raise RuntimeError(message)
+                self._api.warning(message)
+                return
+            if first is False:
+                self._resend(unresolved)
+            first = False
+            time.sleep(1)
+        slowest = max(self._resolution_times, key=self._resolution_times.get)
+        self._api.info('gateways resolved %ssecs, slowest %s %ssecs' %
+                       (str(time.time() - start), slowest,
+                        str(self._resolution_times[slowest])))
+
+    def _select_sessions(self, device_names):
+        """Return a dict of device group names to the number of bgp sessions
+        of the device group that are not up using one select
+        """
+        payload = {
+            'selects': [{
+                'from':
+                '/',
+                'properties': [],
+                'children': [{
+                    'child': 'topology',
+                    'properties': [],
+                    'filters': []
+                }, {
+                    'child':
+                    'deviceGroup',
+                    'properties': ['name'],
+                    'filters': [{
+                        'property':
+                        'name',
+                        'regex':
+                        '^(%s)$' % '|'.join([
+                            re.escape(name) for name in self._get_device_groups(device_names)
+                        ])
+                    }]
+                }, {
+                    'child': 'ethernet',
+                    'properties': [],
+                    'filters': []
+                }, {
+                    'child': 'ipv4',
+                    'properties': [],
+                    'filters': []
+                }, {
+                    'child': 'bgpIpv4Peer',
+                    'properties': ['sessionStatus'],
+                    'filters': []
+                }],
+                'inlines': []
+            }]
+        }
+        url = '%s/operations/select?xpath=true' % self._api._ixnetwork.href
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        down = {}
+        for topology in results[0].get('topology', []):
+            for device_group in topology.get('deviceGroup', []):
+                for ethernet in device_group.get('ethernet', []):
+                    for ipv4 in ethernet.get('ipv4', []):
+                        for bgpv4 in ipv4.get('bgpIpv4Peer', []):
+                            count = len([
+                                status for status in bgpv4.get('sessionStatus', [])
+                                if status != 'up'
+                            ])
+                            if count > 0:
+                                down[device_group['name']] = down.get(
+                                    device_group['name'], 0) + count
+        return down
+
+    def wait_sessions(self, device_names, timeout=120):
+        """Wait for the bgp sessions of the devices to be up
+
+        A started device group does not mean that its sessions are
+        established, so the session status of all devices is read with one
+        select per iteration. Devices without sessions are not waited for.
+        Raises a RuntimeError if sessions are not up after timeout seconds.
+        """
+        if len(device_names) == 0:
+            return
+        start = time.time()
+        while True:
+            down = self._select_sessions(device_names)
+            if len(down) == 0:
+                break
+            if time.time() - start > timeout:
+                raise RuntimeError('After %s seconds, sessions of [%s] are not up' % (
+                    timeout, ', '.join(['%s (%s down)' % (name, count)
+                                        for name, count in down.items()])))
+            time.sleep(1)
+        self._api.info('sessions up %ssecs' % str(time.time() - start))
+
+    def _resend(self, unresolved):
+        hrefs = {}
+        for stacks in unresolved.values():
+            for node, href in stacks:
+                if href not in hrefs.setdefault(node, []):
+                    hrefs[node].append(href)
+        for node, node_hrefs in hrefs.items():
+            url = '%s/%s' % (self._api._ixnetwork.href,
+                             Protocol._RESOLVE_OPERATIONS[node])
+            self._api._ixnetwork._connection._execute(url, {'arg1': node_hrefs})
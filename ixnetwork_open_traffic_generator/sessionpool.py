@@ -0,0 +1,194 @@
+import threading
+from ixnetwork_restpy import SessionAssistant
+
+
+class SessionPool(object):
+    """A pool of warm IxNetwork API Server sessions
+
+    Creating a session on a Linux IxNetwork API Server takes tens of seconds.
+    The pool keeps idle sessions alive so that an IxNetworkApi instance can
+    lease one with a clean configuration and return it when it is done
+    instead of removing it.
+
+    Pool sessions are named '<session_name> <slot>' so that a new pool in a
+    later process reconnects to the sessions left running by a previous one
+    rather than creating new sessions.
+
+    Args
+    ----
+    - address (str): The address of the IxNetwork API Server
+    - port (str): The rest port of the IxNetwork API Server
+    - username (str): The username for Linux IxNetwork API Server multi session environments
+    - password (str): The password for Linux IxNetwork API Server multi session environments
+    - warm_sessions (int): The number of idle sessions to keep ready
+    - max_sessions (int): The maximum number of sessions the pool will hold
+    - session_name (str): The prefix of the name of every pool session
+    """
+    def __init__(self,
+                 address='127.0.0.1',
+                 port='11009',
+                 username='admin',
+                 password='admin',
+                 warm_sessions=1,
+                 max_sessions=4,
+                 session_name='ixn-otg-pool'):
+        if warm_sessions > max_sessions:
+            raise ValueError(
+                'warm_sessions %s cannot exceed max_sessions %s' %
+                (warm_sessions, max_sessions))
+        self._address = address
+        self._port = port
+        self._username = username
+        self._password = password
+        self._warm_sessions = warm_sessions
+        self._max_sessions = max_sessions
+        self._session_name = session_name
+        self._idle = {}
+        self._leased = {}
+        self._lock = threading.Lock()
+
+    @property
+    def idle(self):
+        """The number of idle sessions in the pool
+        """
+        return len(self._idle)
+
+    @property
+    def leased(self):
+        """The number of sessions currently leased from the pool
+        """
+        return len(self._leased)
+
+    def warm(self):
+        """Connect to or create sessions until warm_sessions are idle
+        """
+        while True:
+            with self._lock:
+                if len(self._idle) >= self._warm_sessions:
+                    return
+                slot = self._free_slot()
+                if slot is None:
+                    return
+                self._leased[slot] = None
+            assistant = self._create_reserved(slot)
+            with self._lock:
+                del self._leased[slot]
+                self._idle[slot] = assistant
+
+    def lease(self):
+        """Lease a healthy session with a clean configuration
+
+        Idle sessions that fail the health check are removed and replaced.
+        A session is only created when no idle session is available.
+        Raises a RuntimeError if no healthy session is found after
+        max_sessions + 1 attempts.
+        """
+        attempts = self._max_sessions + 1
+        for attempt in range(attempts):
+            with self._lock:
+                if len(self._idle) > 0:
+                    slot = sorted(self._idle.keys())[0]
+                    assistant = self._idle.pop(slot)
+                else:
+                    slot = self._free_slot()
+                    assistant = None
+                if slot is None:
+                    raise RuntimeError('All %s pool sessions are leased' %
+                                       self._max_sessions)
+                self._leased[slot] = assistant
+            try:
+                if assistant is None:
+                    assistant = self._create(slot)
+                    with self._lock:
+                        self._leased[slot] = assistant
+                if self._is_healthy(assistant) is True:
+                    assistant.Ixnetwork.NewConfig()
+                    return assistant
+            except Exception:
+                self._discard(slot, assistant)
+                raise
+            self._discard(slot, assistant)
+        raise RuntimeError('No healthy pool session after %s attempts' %
+                           attempts)
+
+    def release(self, assistant):
+        """Return a leased session to the pool
+
+        Sessions beyond the warm_sessions count are removed from the server.
+        """
+        keep = False
+        with self._lock:
+            for slot, leased in list(self._leased.items()):
+                if leased is assistant:
+                    del self._leased[slot]
+                    if len(self._idle) < self._warm_sessions:
+                        self._idle[slot] = assistant
+                        keep = True
+                    break
+        if keep is False:
+            self._remove(assistant)
+
+    def close(self, remove_sessions=False):
+        """Detach from all idle sessions
+
+        By default the sessions are left running on the server so that the
+        next pool with the same session_name starts warm.
+        If remove_sessions is True the idle sessions are removed.
+        """
+        with self._lock:
+            idle = list(self._idle.values())
+            self._idle = {}
+        if remove_sessions is True:
+            for assistant in idle:
+                self._remove(assistant)
+
+    def _free_slot(self):
+        for slot in range(1, self._max_sessions + 1):
+            if slot not in self._idle and slot not in self._leased:
+                return slot
+        return None
+
+    def _create_reserved(self, slot):
+        """Create the session of a slot that is reserved in _leased.
+        The reservation is removed if the session cannot be created.
+        """
+        try:
+            return self._create(slot)
+        except Exception:
+            with self._lock:
+                self._leased.pop(slot, None)
+            raise
+
+    def _discard(self, slot, assistant):
+        """Free the slot of a leased session and remove the session
+        """
+        with self._lock:
+            self._leased.pop(slot, None)
+        if assistant is not None:
+            self._remove(assistant)
+
+    def _create(self, slot):
+        """Connect to the session named for the slot, creating it if needed
+        """
+        return SessionAssistant(IpAddress=self._address,
+                                RestPort=self._port,
+                                UserName=self._username,
+                                Password=self._password,
+                                SessionName='%s %s' %
+                                (self._session_name, slot),
+                                LogLevel=SessionAssistant.LOGLEVEL_INFO)
+
+    def _is_healthy(self, assistant):
+        """A session is healthy if its /ixnetwork root can be read
+        """
+        try:
+            assistant.Session._connection._read(assistant.Ixnetwork.href)
+            return True
+        except Exception:
+            return False
+
+    def _remove(self, assistant):
+        try:
+            assistant.Session.remove()
+        except Exception:
+            pass
@@ -0,0 +1,173 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StatView(object):
+    """Paged reader of a /statistics/view
+
+    The rows of the view are read one page at a time from
+    /statistics/view/page and yielded in chunks of a fixed number of rows so
+    that client memory is bounded by the page size and the chunk size
+    instead of by the number of rows in the view.
+
+    The page of a view is a single server side object so pages cannot be
+    read in parallel. While the caller processes the rows of one page the
+    next page is read by a worker thread.
+
+    Args
+    ----
+    - ixnetworkapi (IxNetworkApi): instance of the ixnetworkapi class
+    - caption (str): The caption of the view
+    - page_size (int): The number of rows per page
+    - prefetch (bool): Read the next page while the current page is processed
+    - timeout (int): Seconds to wait for the view to exist and be ready
+    """
+    def __init__(self,
+                 ixnetworkapi,
+                 caption,
+                 page_size=1000,
+                 prefetch=True,
+                 timeout=60):
+        self._api = ixnetworkapi
+        self._caption = caption
+        self._page_size = page_size
+        self._prefetch = prefetch
+        self._timeout = timeout
+        self._column_captions = None
+        self._total_rows = None
+
+    @property
+    def column_captions(self):
+        """The column captions of the view, available once the first page
+        has been read
+        """
+        return self._column_captions
+
+    @property
+    def total_rows(self):
+        """The number of rows in the view, available once the first page
+        has been read
+        """
+        return self._total_rows
+
+    def pages(self):
+        """Yield the rows of every page of the view as a list of lists
+
+        The page size and current page of the view are restored once the
+        pages have been read so that other readers of the view are not
+        affected.
+        """
+        connection = self._api._ixnetwork._connection
+        view = self._select_view()
+        page_href = view['href'] + '/page'
+        settings = {
+            'pageSize': view['page'][0]['pageSize'],
+            'currentPage': view['page'][0]['currentPage']
+        }
+        try:
+            page = self._read_first(connection, page_href)
+            total_pages = page['totalPages']
+            if self._prefetch is False or total_pages < 2:
+                yield self._get_rows(page)
+                for current_page in range(2, total_pages + 1):
+                    yield self._get_rows(
+                        self._read_page(connection, page_href, current_page))
+                return
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(self._read_page, connection, page_href, 2)
+                yield self._get_rows(page)
+                for current_page in range(2, total_pages + 1):
+                    page = future.result()
+                    if current_page < total_pages:
+                        future = executor.submit(self._read_page, connection,
+                                                 page_href, current_page + 1)
+                    yield self._get_rows(page)
+        finally:
+            connection._update(page_href, settings)
+
+    def chunks(self, chunk_size=None):
+        """Yield the rows of the view in lists of chunk_size rows
+        The last chunk holds the remaining rows.
+        """
+        if chunk_size is None:
+            chunk_size = self._page_size
+        chunk = []
+        for rows in self.pages():
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if len(chunk) > 0:
+            yield chunk
+
+    def rows(self):
+        """Yield every row of the view as a dict of column captions to values
+        """
+        for rows in self.pages():
+            for row in rows:
+                yield dict(zip(self._column_captions, row))
+
+    def _select_view(self):
+        """Return the view with its page settings using one select per
+        poll. A view that is created by a start or apply can take a while
+        to appear so the view is polled for up to timeout seconds.
+        """
+        payload = {
+            'selects': [{
+                'from': '/statistics',
+                'properties': [],
+                'children': [{
+                    'child': 'view',
+                    'properties': ['caption'],
+                    'filters': [{
+                        'property': 'caption',
+                        'regex': '^%s$' % re.escape(self._caption)
+                    }]
+                }, {
+                    'child': 'page',
+                    'properties': ['pageSize', 'currentPage'],
+                    'filters': []
+                }],
+                'inlines': []
+            }]
+        }
+        url = '%s/operations/select?xpath=true' % self._api._ixnetwork.href
+        start = time.time()
+        while True:
+            results = self._api._ixnetwork._connection._execute(url, payload)
+            views = results[0].get('view', [])
+            if len(views) > 0:
+                return views[0]
+            if time.time() - start > self._timeout:
+                raise ValueError('After %s seconds, %s view does not exist' %
+                                 (self._timeout, self._caption))
+            time.sleep(1)
+
+    def _read_first(self, connection, page_href):
+        connection._update(page_href, {
+            'pageSize': self._page_size,
+            'currentPage': 1
+        })
+        start = time.time()
+        page = connection._read(page_href)
+        while page['isReady'] is False:
+            if time.time() - start > self._timeout:
+                raise RuntimeError('After %s seconds, %s view is not ready' %
+                                   (self._timeout, self._caption))
+            time.sleep(1)
+            page = connection._read(page_href)
+        self._column_captions = page['columnCaptions']
+        self._total_rows = page['totalRows']
+        return page
+
+    def _read_page(self, connection, page_href, current_page):
+        connection._update(page_href, {'currentPage': current_page})
+        return connection._read(page_href)
+
+    def _get_rows(self, page):
+        """pageValues holds a list of rows per view row, the first of which
+        is the row itself and the rest are drill down rows
+        """
+        return [row[0] for row in page['pageValues']]
@@ -0,0 +1,302 @@
+import time
+from abstract_open_traffic_generator.flow import Rate, Size
+from ixnetwork_open_traffic_generator.statview import StatView
+
+
+class Throughput(object):
+    """RFC 2544 throughput search over a set of configured flows
+
+    A trial transmits every flow at the same rate for a fixed duration and
+    passes if the loss of the trial is within the loss tolerance.
+    The rate of each trial is found by a binary search between a minimum
+    and a maximum rate, or with the guided strategy by starting from the
+    rate the DUT forwarded in the last failed trial.
+
+    Rate and frame size changes are written with the deferred select and
+    import of TrafficItem and the traffic items are generated and applied
+    between trials while traffic is stopped. Trial counters are the difference between
+    the raw flow counters before and after the trial so no statistics are
+    cleared between trials.
+
+    The flows should have a continuous duration. The configured size and
+    rate of every flow are restored when the search ends.
+
+    Args
+    ----
+    - ixnetworkapi (IxNetworkApi): instance of the ixnetworkapi class
+    """
+    _LATENCY_CAPTIONS = {
+        'latency_min_ns': 'Min Latency (ns)',
+        'latency_avg_ns': 'Avg Latency (ns)',
+        'latency_max_ns': 'Max Latency (ns)'
+    }
+
+    def __init__(self, ixnetworkapi):
+        self._api = ixnetworkapi
+        self._trials = []
+
+    @property
+    def trials(self):
+        """A list of every trial of the last search.
+        A trial is a dict of frame_size, rate, frames_tx, frames_rx, loss,
+        passed and seconds.
+        """
+        return self._trials
+
+    def search(self,
+               flow_names,
+               frame_sizes=None,
+               unit='line',
+               maximum=100.0,
+               minimum=0.0,
+               resolution=0.1,
+               duration=10,
+               loss_tolerance=0.0,
+               strategy='binary',
+               max_trials=20,
+               latency=False):
+        """Find the highest rate of the flows without loss per frame size
+
+        Args
+        ----
+        - flow_names (list(str)): The flows that are transmitted in every trial
+        - frame_sizes (list(int)): The fixed frame sizes to search,
+            None searches the configured frame size
+        - unit (str): The Rate.unit of the rates, line|pps|bps|kbps|mbps|gbps
+        - maximum (float): The rate of the first trial
+        - minimum (float): The rate below which the search stops
+        - resolution (float): The search stops when the highest passed rate
+            and the lowest failed rate are closer than this
+        - duration (int): The seconds of every trial
+        - loss_tolerance (float): The highest loss % of a passed trial
+        - strategy (str): binary|guided
+        - max_trials (int): The maximum number of trials per frame size
+        - latency (bool): Clear the statistics and run one more trial at the
+            throughput of every frame size to report its latency
+
+        Return a list of dicts with one row per frame size of frame_size,
+        throughput, unit, frames_tx, frames_rx, loss and trials.
+        With latency the row also has latency_min_ns, latency_avg_ns and
+        latency_max_ns, these are None if latency is not measured by the
+        traffic items.
+        """
+        if strategy not in ['binary', 'guided']:
+            raise ValueError('%s is not a valid throughput strategy' % strategy)
+        traffic_item = self._api.traffic_item
+        hrefs = traffic_item._get_hrefs(flow_names)
+        streams = self._select_streams(hrefs)
+        traffic_item._prepare(flow_names, hrefs)
+        self._trials = []
+        table = []
+        try:
+            for frame_size in (frame_sizes or [None]):
+                start = time.time()
+                row = self._search(flow_names, hrefs, streams, frame_size,
+                                   unit, maximum, minimum, resolution,
+                                   duration, loss_tolerance, strategy,
+                                   max_trials)
+                if latency is True:
+                    row.update(self._latency(flow_names, hrefs, streams,
+                                             frame_size, unit,
+                                             row['throughput'], duration))
+                table.append(row)
+                self._api.info('throughput %s %s %s %ssecs' %
+                               (frame_size, row['throughput'], unit,
+                                str(time.time() - start)))
+        finally:
+            self._restore(streams)
+        return table
+
+    def _search(self, flow_names, hrefs, streams, frame_size, unit, maximum,
+                minimum, resolution, duration, loss_tolerance, strategy,
+                max_trials):
+        row = {
+            'frame_size': frame_size,
+            'throughput': None,
+            'unit': unit,
+            'frames_tx': 0,
+            'frames_rx': 0,
+            'loss': None,
+            'trials': 0
+        }
+        low = minimum
+        high = maximum
+        rate = maximum
+        forwarded = None
+        while row['trials'] < max_trials:
+            trial = self._trial(flow_names, hrefs, streams, frame_size, unit,
+                                rate, duration)
+            trial['passed'] = trial['loss'] <= loss_tolerance
+            self._trials.append(trial)
+            row['trials'] += 1
+            if trial['passed'] is True:
+                low = rate
+                for name in ['frames_tx', 'frames_rx', 'loss']:
+                    row[name] = trial[name]
+                row['throughput'] = rate
+            else:
+                high = rate
+            if rate >= maximum and trial['passed'] is True:
+                break
+            if round(high - low, 9) <= resolution or high <= minimum:
+                break
+            if strategy == 'guided':
+                rate, forwarded = self._guide(trial, rate, forwarded, low,
+                                              high, resolution)
+            else:
+                rate = (low + high) / 2.0
+        return row
+
+    def _guide(self, trial, rate, forwarded, low, high, resolution):
+        """Return the next rate and the forwarded rate it was taken from.
+        After a failed trial the next rate is the rate the DUT forwarded.
+        If that rate passes the next rate is one resolution above it,
+        otherwise the search continues as a binary search.
+        """
+        if trial['passed'] is False and trial['frames_tx'] > 0:
+            estimate = rate * trial['frames_rx'] / trial['frames_tx']
+            if estimate - low > resolution:
+                return estimate, estimate
+        if trial['passed'] is True and rate == forwarded:
+            return min(low + resolution, (low + high) / 2.0), None
+        return (low + high) / 2.0, None
+
+    def _trial(self, flow_names, hrefs, streams, frame_size, unit, rate,
+               duration):
+        """Transmit the flows at the rate for duration seconds
+        Return the trial counters of all flows
+        """
+        start = time.time()
+        traffic_item = self._api.traffic_item
+        for ixn_stream in streams.values():
+            if frame_size is not None:
+                traffic_item._configure_size(ixn_stream, Size(frame_size))
+            traffic_item._configure_rate(ixn_stream, Rate(unit=unit, value=rate))
+        self._apply_changes(hrefs)
+        before = self._read(flow_names)
+        traffic_item._execute('startStatelessTrafficBlocking', hrefs)
+        time.sleep(duration)
+        traffic_item._execute('stopStatelessTrafficBlocking', hrefs)
+        after = self._read_settled(flow_names)
+        trial = {
+            'frame_size': frame_size,
+            'rate': rate,
+            'frames_tx': 0,
+            'frames_rx': 0
+        }
+        for name, counters in after.items():
+            base = before.get(name, {})
+            for counter in ['frames_tx', 'frames_rx']:
+                trial[counter] += counters.get(counter, 0) - base.get(counter, 0)
+        tx = trial['frames_tx']
+        trial['loss'] = (tx - trial['frames_rx']) * 100.0 / tx if tx > 0 else 100.0
+        trial['seconds'] = time.time() - start
+        return trial
+
+    def _latency(self, flow_names, hrefs, streams, frame_size, unit, rate,
+                 duration):
+        """Run one trial at the throughput after clearing the statistics
+        and return the minimum, average and maximum latency of the flows
+        """
+        latency = dict((name, None) for name in Throughput._LATENCY_CAPTIONS)
+        if rate is None:
+            return latency
+        self._api._ixnetwork.ClearStats(['waitForTrafficStatsRefresh'])
+        self._api.counters.reset()
+        self._trial(flow_names, hrefs, streams, frame_size, unit, rate, duration)
+        matches = self._api.traffic_item._get_matcher(flow_names)
+        values = dict((name, []) for name in Throughput._LATENCY_CAPTIONS)
+        view = StatView(self._api, 'Traffic Item Statistics')
+        for row in view.rows():
+            if matches(row['Traffic Item']) is False:
+                continue
+            for name, suffix in Throughput._LATENCY_CAPTIONS.items():
+                for caption, value in row.items():
+                    if caption.endswith(suffix):
+                        try:
+                            values[name].append(float(value))
+                        except ValueError:
+                            pass
+        if len(values['latency_min_ns']) > 0:
+            latency['latency_min_ns'] = min(values['latency_min_ns'])
+        if len(values['latency_avg_ns']) > 0:
+            latency['latency_avg_ns'] = sum(values['latency_avg_ns']) / len(
+                values['latency_avg_ns'])
+        if len(values['latency_max_ns']) > 0:
+            latency['latency_max_ns'] = max(values['latency_max_ns'])
+        return latency
+
+    def _read(self, flow_names):
+        """Return a dict of flow names to the raw frame counters
+        Raise the errors of the read so that a failed read is not taken
+        as zero counters and a trial is not judged on them
+        """
+        request = self._api._dict_to_obj({
+            'flow_names': flow_names,
+            'column_names': ['name', 'frames_tx', 'frames_rx']
+        })
+        self._api._errors = []
+        rows = self._api.traffic_item.results(request, baseline=False)
+        if len(self._api._errors) > 0:
+            raise Exception('\n'.join(self._api._errors))
+        return dict((row['name'], row) for row in rows)
+
+    def _read_settled(self, flow_names, timeout=10):
+        """Read the counters until the received frames stop changing
+        """
+        start = time.time()
+        counters = self._read(flow_names)
+        while time.time() - start < timeout:
+            time.sleep(0.5)
+            previous = counters
+            counters = self._read(flow_names)
+            if counters == previous:
+                break
+        return counters
+
+    def _select_streams(self, hrefs):
+        """Return a dict of traffic item hrefs to their config element
+        using one select
+        """
+        root = self._api._ixnetwork.href
+        payload = {'selects': []}
+        for href in hrefs:
+            payload['selects'].append({
+                'from': href[len(root):],
+                'properties': [],
+                'children': [{
+                    'child': 'configElement',
+                    'properties': [],
+                    'filters': []
+                }],
+                'inlines': []
+            })
+        url = '%s/operations/select?xpath=true' % root
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        streams = {}
+        for i in range(len(hrefs)):
+            streams[hrefs[i]] = self._api._dict_to_obj(
+                {'href': results[i]['configElement'][0]['href']})
+        return streams
+
+    def _restore(self, streams):
+        """Write the configured size and rate of the flows back
+        """
+        traffic_item = self._api.traffic_item
+        for flow in self._api.config.flows:
+            ixn_stream = streams.get(self._api.ixn_objects.get(flow.name))
+            if ixn_stream is None:
+                continue
+            traffic_item._configure_size(ixn_stream, flow.size)
+            traffic_item._configure_rate(ixn_stream, flow.rate)
+        self._apply_changes(list(streams.keys()))
+
+    def _apply_changes(self, hrefs):
+        """Write the deferred size and rate changes and apply them.
+        Traffic is stopped between trials and a change applied on the fly
+        only reaches the hardware while traffic is running, so the traffic
+        items are generated and applied instead.
+        """
+        if self._api.traffic_item._flush() is True:
+            self._api.traffic_item._execute('generate', hrefs)
+            self._api._traffic.Apply()
@@ -1,7 +1,9 @@
 import json
+import re
 import time
 from ixnetwork_open_traffic_generator.customfield import CustomField
-from ixnetwork_restpy import StatViewAssistant
+from ixnetwork_open_traffic_generator.patternoptimizer import PatternOptimizer
+from ixnetwork_open_traffic_generator.statview import StatView
 
 
 class TrafficItem(CustomField):
@@ -26,6 +28,17 @@ class TrafficItem(CustomField):
         'loss',
     ]
     
+    _RESULT_CAPTIONS = {
+        'frames_tx': ('Tx Frames', int),
+        'frames_rx': ('Rx Frames', int),
+        'bytes_rx': ('Rx Bytes', int),
+        'frames_tx_rate': ('Tx Frame Rate', float),
+        'frames_rx_rate': ('Rx Frame Rate', float),
+        'bytes_tx_rate': ('Tx Rate (Bps)', float),
+        'bytes_rx_rate': ('Rx Rate (Bps)', float),
+        'loss': ('Loss %', float),
+    }
+
     _STACK_IGNORE = [
         'ethernet.fcs'
     ]
@@ -135,10 +148,29 @@ class TrafficItem(CustomField):
     }
     
     _CUSTOM = '_custom_headers'
+
+    _ON_THE_FLY = ['rate', 'size']
+
+    _MAX_HREFS = 500
     
     def __init__(self, ixnetworkapi):
         self._api = ixnetworkapi
-        
+        self._optimizer = PatternOptimizer()
+        self._configured = {}
+        self._ingress = {}
+        self._changes = {}
+        self._flow_name = None
+        self._templates = None
+        self._templates_session = None
+        self._deferred = []
+
+    @property
+    def changes(self):
+        """A dict of flow names to the kind of change that has not been
+        applied yet, either generate or on_the_fly
+        """
+        return self._changes
+
     def config(self):
         """Configure config.flows onto Ixnetwork.Traffic.TrafficItem
         
@@ -147,29 +179,195 @@ class TrafficItem(CustomField):
         - DELETE any TrafficItem.Name that does not exist in config.flows
         - CREATE TrafficItem for any config.flows[*].name that does not exist
         - UPDATE TrafficItem for any config.flows[*].name that exists
+
+        A flow that is identical to the last configured flow with the same
+        endpoint hrefs is not updated so that its traffic item stays applied.
+        Every other flow is recorded in changes for transmit.
+
+        The frame size, frame rate and transmission control of all flows are
+        read with one select and only their differences are written with
+        one import.
+
+        New flows with the same shape, see _get_shape, are created by
+        building the first flow as a prototype and duplicating it on the
+        server. Only the endpoints, headers and options of the copies that
+        differ from the prototype are then configured.
         """
         ixn_traffic_item = self._api._traffic_item
         self._api._remove(ixn_traffic_item, self._api.config.flows)
-        if self._api.config.flows is not None:
-            for flow in self._api.config.flows:
-                args = {
-                    'Name': flow.name,
-                    'TrafficItemType': 'l2L3',
-                    'TrafficType': self._get_traffic_type(flow)
-                }
-                ixn_traffic_item.find(Name='^%s$' % flow.name, TrafficType=args['TrafficType'])
-                if len(ixn_traffic_item) == 0:
-                    ixn_traffic_item.add(**args)
-                else:
-                    self._update(ixn_traffic_item, **args)
-                self._configure_endpoint(ixn_traffic_item.EndpointSet, flow.tx_rx)
-                self._configure_tracking(ixn_traffic_item.Tracking)
-                ixn_stream = ixn_traffic_item.ConfigElement.find()
-                self._configure_stack(ixn_stream, flow.packet)
-                self._configure_size(ixn_stream, flow.size)
-                self._configure_rate(ixn_stream, flow.rate)
-                self._configure_tx_control(ixn_stream, flow.duration)
+        self._deferred = []
+        flows = self._api.config.flows
+        if flows is None:
+            flows = []
+        existing = self._api.select_traffic_items()
+        prototypes = self._get_prototypes(
+            [flow for flow in flows if flow.name not in existing])
+        configured = {}
+        for flow in flows:
+            if flow.name in prototypes:
+                continue
+            args = {
+                'Name': flow.name,
+                'TrafficItemType': 'l2L3',
+                'TrafficType': self._get_traffic_type(flow)
+            }
+            ixn_traffic_item.find(Name='^%s$' % re.escape(flow.name),
+                                  TrafficType=args['TrafficType'])
+            snapshot = self._get_snapshot(flow)
+            configured[flow.name] = snapshot
+            if len(ixn_traffic_item) == 0:
+                ixn_traffic_item.add(**args)
+                self._changes[flow.name] = 'generate'
+            elif self._configured.get(flow.name) == snapshot:
+                self._api.ixn_objects[flow.name] = ixn_traffic_item.href
+                for name, href in self._ingress.get(flow.name, {}).items():
+                    self._api.ixn_objects[name] = href
                 self._configure_options(flow)
+                continue
+            else:
+                self._update(ixn_traffic_item, **args)
+                self._add_change(flow.name, self._configured.get(flow.name), snapshot)
+            self._configure_traffic_item(ixn_traffic_item, flow)
+            clones = [
+                clone for clone in flows if prototypes.get(clone.name) is flow
+            ]
+            if len(clones) > 0:
+                self._clone(ixn_traffic_item, flow, clones, configured)
+        self._flush()
+        for name in list(self._changes.keys()):
+            if name not in configured:
+                self._changes.pop(name)
+        self._configured = configured
+
+    def _configure_traffic_item(self, ixn_traffic_item, flow, prototype=None):
+        """Configure the children of a traffic item from a flow.
+        The tracking and the headers of a traffic item that was duplicated
+        from the prototype flow are only configured where they differ.
+        """
+        self._api.ixn_objects[flow.name] = ixn_traffic_item.href
+        self._ingress[flow.name] = {}
+        self._flow_name = flow.name
+        self._configure_endpoint(ixn_traffic_item.EndpointSet, flow.tx_rx)
+        if prototype is None:
+            self._configure_tracking(ixn_traffic_item.Tracking)
+        ixn_stream = ixn_traffic_item.ConfigElement.find()
+        self._configure_stack(ixn_stream, flow.packet,
+                              None if prototype is None else prototype.packet)
+        self._configure_size(ixn_stream, flow.size)
+        self._configure_rate(ixn_stream, flow.rate)
+        self._configure_tx_control(ixn_stream, flow.duration)
+        self._configure_options(flow)
+
+    def _get_prototypes(self, flows):
+        """Group the flows by shape.
+        Return a dict of flow names to the prototype flow of their group for
+        every flow that is not the first flow of a group of 2 or more.
+        """
+        groups = {}
+        for flow in flows:
+            groups.setdefault(self._get_shape(flow), []).append(flow)
+        prototypes = {}
+        for group in groups.values():
+            for flow in group[1:]:
+                prototypes[flow.name] = group[0]
+        return prototypes
+
+    def _get_shape(self, flow):
+        """Return a key that is equal for flows whose traffic items have the
+        same traffic type, endpoint kind, stack types and tracked fields
+        """
+        headers = []
+        for header in self.adjust_header(flow.packet):
+            packet = getattr(header, header.choice)
+            tracked = [
+                name for name in dir(packet) if getattr(
+                    getattr(packet, name), 'ingress_result_name', None) is not None
+            ]
+            headers.append((header.choice, tuple(sorted(tracked))))
+        return (self._get_traffic_type(flow), flow.tx_rx.choice, tuple(headers))
+
+    def _clone(self, ixn_traffic_item, prototype, clones, configured):
+        """Duplicate the prototype traffic item once for every clone flow,
+        name the copies with one import and configure their differences
+        """
+        start = time.time()
+        self._flush()
+        before = [item['href'] for item in self._select_traffic_items()]
+        ixn_traffic_item.Duplicate(len(clones))
+        copies = [
+            item for item in self._select_traffic_items()
+            if item['href'] not in before
+        ]
+        copies.sort(key=lambda item: int(item['href'].rsplit('/', 1)[1]))
+        if len(copies) != len(clones):
+            raise RuntimeError('Duplicating %s created %s traffic items instead of %s' %
+                               (prototype.name, len(copies), len(clones)))
+        imports = []
+        for i in range(len(clones)):
+            imports.append({'xpath': copies[i]['xpath'], 'name': clones[i].name})
+        self._api._ixnetwork.ResourceManager.ImportConfig(json.dumps(imports), False)
+        for i in range(len(clones)):
+            flow = clones[i]
+            ixn_traffic_item.read(copies[i]['href'])
+            configured[flow.name] = self._get_snapshot(flow)
+            self._changes[flow.name] = 'generate'
+            self._configure_traffic_item(ixn_traffic_item, flow, prototype)
+        self._api.info('flow %s cloned %s times %ssecs' %
+                       (prototype.name, len(clones), str(time.time() - start)))
+
+    def _select_traffic_items(self, properties=[]):
+        """Return the href, xpath and properties of every traffic item
+        using one select
+        """
+        payload = {
+            'selects': [{
+                'from': '/traffic',
+                'properties': [],
+                'children': [{
+                    'child': 'trafficItem',
+                    'properties': properties,
+                    'filters': []
+                }],
+                'inlines': []
+            }]
+        }
+        url = '%s/operations/select?xpath=true' % self._api._ixnetwork.href
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        return results[0].get('trafficItem', [])
+
+    def _get_snapshot(self, flow):
+        """Return a comparable copy of the flow and the hrefs of its endpoints
+        """
+        snapshot = json.loads(json.dumps(flow, default=lambda o: o.__dict__))
+        endpoint = flow.tx_rx
+        if endpoint.choice == 'port':
+            names = [endpoint.port.tx_port_name, endpoint.port.rx_port_name]
+        else:
+            names = endpoint.device.tx_device_names + endpoint.device.rx_device_names
+        snapshot['_endpoints'] = [
+            self._api.ixn_objects.get(name) for name in names
+        ]
+        snapshot['_slices'] = [
+            self._api.ngpf.get_device_slice(name) for name in names
+        ]
+        return json.loads(json.dumps(snapshot))
+
+    def _add_change(self, name, previous, snapshot):
+        """Record the kind of change of a flow.
+        Rate and size changes can be applied on the fly, any other change
+        requires the traffic item to be generated and applied.
+        """
+        kind = 'generate'
+        if previous is not None:
+            keys = set(previous.keys()) | set(snapshot.keys())
+            changed = [
+                key for key in keys if previous.get(key) != snapshot.get(key)
+            ]
+            if len(changed) > 0 and len(
+                    set(changed) - set(TrafficItem._ON_THE_FLY)) == 0:
+                kind = 'on_the_fly'
+        if self._changes.get(name) != 'generate':
+            self._changes[name] = kind
     
     def _configure_tracking(self, ixn_tracking):
         ixn_tracking.find()
@@ -209,25 +407,45 @@ class TrafficItem(CustomField):
         """
         args = {
             'Sources': [],
-            'Destinations' : []
+            'Destinations' : [],
+            'ScalableSources': [],
+            'ScalableDestinations': []
         }
         if (endpoint.choice == "port"):
             args['Sources'].append(self._api.get_ixn_object(endpoint.port.tx_port_name).Protocols.find().href)
             if endpoint.port.rx_port_name != None:
                 args['Destinations'].append(self._api.get_ixn_object(endpoint.port.rx_port_name).Protocols.find().href)
         else:
-            for port_name in endpoint.device.tx_device_names:
-                args['Sources'].append(self._api.get_ixn_href(port_name))
-            for port_name in endpoint.device.rx_device_names:
-                args['Destinations'].append(self._api.get_ixn_href(port_name))
+            self._configure_device_endpoints(args, 'Sources',
+                                             endpoint.device.tx_device_names)
+            self._configure_device_endpoints(args, 'Destinations',
+                                             endpoint.device.rx_device_names)
         ixn_endpoint_set.find()
         if len(ixn_endpoint_set) > 1:
             ixn_endpoint_set.remove()
         if len(ixn_endpoint_set) == 0:
             ixn_endpoint_set.add(**args)
-        elif ixn_endpoint_set.Sources != args['Sources'] or ixn_endpoint_set.Destinations != args['Destinations']:
+        else:
             self._update(ixn_endpoint_set, **args)
 
+    def _configure_device_endpoints(self, args, key, device_names):
+        """A folded device is the scalable endpoint of its slice of the
+        device group, any other device is the endpoint of its device group
+        """
+        for name in device_names:
+            device_slice = self._api.ngpf.get_device_slice(name)
+            if device_slice is None:
+                args[key].append(self._api.get_ixn_href(name))
+                continue
+            href, start, count = device_slice
+            args['Scalable%s' % key].append({
+                'arg1': href,
+                'arg2': 1,
+                'arg3': 1,
+                'arg4': start,
+                'arg5': count
+            })
+
     def _update(self, ixn_object, **kwargs):
         from ixnetwork_restpy.base import Base
         update = False
@@ -241,41 +459,176 @@ class TrafficItem(CustomField):
         if update is True:
             ixn_object.update(**kwargs)
 
-    def _configure_stack(self, ixn_stream, headers):
+    def _defer(self, href, **kwargs):
+        """Defer the update of an object until _flush
+        The object is not read, kwargs are restpy attribute names
+        """
+        attributes = {}
+        for name, value in kwargs.items():
+            if value is not None:
+                attributes[name[0].lower() + name[1:]] = value
+        self._deferred.append((href, attributes))
+
+    def _flush(self):
+        """Read the deferred attributes of every object in one select,
+        compare them in memory and write only the differences in one import
+        Return True if anything was written
+        """
+        if len(self._deferred) == 0:
+            return False
+        root = self._api._ixnetwork.href
+        payload = {'selects': []}
+        for href, attributes in self._deferred:
+            payload['selects'].append({
+                'from': href[len(root):],
+                'properties': list(attributes.keys()),
+                'children': [],
+                'inlines': []
+            })
+        url = '%s/operations/select?xpath=true' % root
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        imports = []
+        for i in range(len(self._deferred)):
+            attributes = self._deferred[i][1]
+            current = results[i]
+            changed = {}
+            for name, value in attributes.items():
+                if current.get(name) != value:
+                    changed[name] = value
+            if len(changed) > 0:
+                changed['xpath'] = current['xpath']
+                imports.append(changed)
+        self._deferred = []
+        if len(imports) > 0:
+            self._api._ixnetwork.ResourceManager.ImportConfig(
+                json.dumps(imports), False)
+        return len(imports) > 0
+
+    def _configure_stack(self, ixn_stream, headers, prototype_headers=None):
         """Transform flow.packets[0..n] to /traffic/trafficItem/configElement/stack
         The len of the headers list is the definitive list which means add/remove
         any stack items so that the stack list matches the headers list.
         If the headers list is empty then use the traffic generator default stack.
+
+        The existing stacks are aligned with the headers on the longest
+        common subsequence of stack type ids so that only the stacks that
+        differ are inserted or removed and every other stack is kept.
+        Stack hrefs are positional so the stacks are read again after every
+        insert and removals are done from the last stack to the first.
+
+        The fields of a header that is identical to the header at the same
+        position of the prototype_headers the stack was duplicated from
+        are not configured.
         """
-        stacks_to_remove = []
-        ixn_stack = ixn_stream.Stack.find()
         headers = self.adjust_header(headers)
-        for i in range(0, len(headers)):
-            header = headers[i]
-            if len(ixn_stack) <= i:
-                stack = self._add_stack(ixn_stream, stack, header)
+        unchanged = []
+        if prototype_headers is not None:
+            prototype_headers = self.adjust_header(prototype_headers)
+            for j in range(min(len(headers), len(prototype_headers))):
+                if self._dumps(headers[j]) == self._dumps(prototype_headers[j]):
+                    unchanged.append(j)
+        ixn_stack = ixn_stream.Stack.find()
+        existing = [ixn_stack[i].StackTypeId for i in range(len(ixn_stack))]
+        desired = [TrafficItem._HEADER_TO_TYPE[header.choice] for header in headers]
+        candidates = [
+            i for i in range(len(existing))
+            if existing[i] not in TrafficItem._STACK_IGNORE
+        ]
+        matches = self._align_stack(
+            [existing[i] for i in candidates], desired)
+        # positions holds the desired index of every server stack in order,
+        # None for ignored stacks and -1 for stacks that will be removed
+        positions = [None] * len(existing)
+        for i in candidates:
+            positions[i] = -1
+        for candidate, j in matches.items():
+            positions[candidates[candidate]] = j
+        for j in range(len(desired)):
+            if j in positions:
+                continue
+            if j == 0:
+                ixn_stack[0].InsertProtocol(self._get_template(desired[j]))
+                positions.insert(0, j)
             else:
-                stack_type_id = ixn_stack[i].StackTypeId
-                if stack_type_id in self._STACK_IGNORE:
-                    stack = self._add_stack(ixn_stream, stack, header)
-                elif stack_type_id not in TrafficItem._TYPE_TO_HEADER:
-                    stacks_to_remove.append(ixn_stack[i])
-                    stack = self._add_stack(ixn_stream, ixn_stack[i], header)
-                elif TrafficItem._TYPE_TO_HEADER[stack_type_id] != header.choice:
-                    stacks_to_remove.append(ixn_stack[i])
-                    stack = self._add_stack(ixn_stream, ixn_stack[i], header)
+                index = positions.index(j - 1)
+                ixn_stack[index].AppendProtocol(self._get_template(desired[j]))
+                positions.insert(index + 1, j)
+            ixn_stack = ixn_stream.Stack.find()
+        if -1 in positions:
+            for index in range(len(positions) - 1, -1, -1):
+                if positions[index] == -1:
+                    ixn_stack[index].Remove()
+                    positions.pop(index)
+            ixn_stack = ixn_stream.Stack.find()
+        for j in range(len(headers)):
+            if j in unchanged:
+                continue
+            self._configure_field(ixn_stack[positions.index(j)].Field, headers[j])
+
+    def _dumps(self, obj):
+        return json.dumps(obj, default=lambda o: o.__dict__, sort_keys=True)
+
+    def _align_stack(self, existing, desired):
+        """Return a dict of existing index to desired index of the longest
+        common subsequence of the existing and desired stack type ids
+        """
+        lengths = [[0] * (len(desired) + 1) for i in range(len(existing) + 1)]
+        for i in range(len(existing) - 1, -1, -1):
+            for j in range(len(desired) - 1, -1, -1):
+                if existing[i] == desired[j]:
+                    lengths[i][j] = lengths[i + 1][j + 1] + 1
                 else:
-                    stack = ixn_stack[i]
-            self._configure_field(stack.Field, header)
-        for stack in stacks_to_remove:
-            stack.Remove()
+                    lengths[i][j] = max(lengths[i + 1][j], lengths[i][j + 1])
+        matches = {}
+        i = j = 0
+        while i < len(existing) and j < len(desired):
+            if existing[i] == desired[j]:
+                matches[i] = j
+                i += 1
+                j += 1
+            elif lengths[i + 1][j] >= lengths[i][j + 1]:
+                i += 1
+            else:
+                j += 1
+        return matches
     
     def _add_stack(self, ixn_stream, ixn_stack, header):
-        type_id = '^%s$' % TrafficItem._HEADER_TO_TYPE[header.choice]
-        template = self._api._traffic.ProtocolTemplate.find(StackTypeId=type_id)
+        template = self._get_template(TrafficItem._HEADER_TO_TYPE[header.choice])
         stack_href = ixn_stack.AppendProtocol(template)
         return ixn_stream.Stack.read(stack_href)
 
+    def _get_template(self, stack_type_id):
+        """Return the href of the /traffic/protocolTemplate of a stack type
+        All protocol templates are selected once per session
+        """
+        if self._templates is None or self._templates_session != self._api._ixnetwork.href:
+            self._templates = self._select_templates()
+            self._templates_session = self._api._ixnetwork.href
+        return self._templates[stack_type_id]
+
+    def _select_templates(self):
+        """Select every protocol template.
+        Return a dict of stackTypeId to protocol template href.
+        """
+        payload = {
+            'selects': [{
+                'from': '/traffic',
+                'properties': [],
+                'children': [{
+                    'child': 'protocolTemplate',
+                    'properties': ['stackTypeId'],
+                    'filters': []
+                }],
+                'inlines': []
+            }]
+        }
+        url = '%s/operations/select?xpath=true' % self._api._ixnetwork.href
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        templates = {}
+        for template in results[0].get('protocolTemplate', []):
+            templates[template['stackTypeId']] = template['href']
+        return templates
+
     def _configure_field(self, ixn_field, header, field_choice=False):
         """Transform flow.packets[0..n].header.choice to /traffic/trafficItem/configElement/stack/field
         """
@@ -308,10 +661,7 @@ class TrafficItem(CustomField):
                 ValueType='singleValue',
                 SingleValue=pattern.fixed)
         elif pattern.choice == 'list':
-            ixn_field.update(Auto=False,
-                ActiveFieldChoice=field_choice,
-                ValueType='valueList',
-                ValueList=pattern.list)
+            self._configure_list(ixn_field, pattern.list, field_choice)
         elif pattern.choice == 'counter':
             value_type = 'increment' if pattern.counter.up is True else 'decrement'
             ixn_field.update(Auto=False,
@@ -336,13 +686,37 @@ class TrafficItem(CustomField):
         if pattern.ingress_result_name is not None:
             ixn_field.TrackingEnabled = True
             self._api.ixn_objects[pattern.ingress_result_name] = ixn_field.href
+            self._ingress.setdefault(self._flow_name, {})[
+                pattern.ingress_result_name] = ixn_field.href
     
+    def _configure_list(self, ixn_field, values, field_choice):
+        """Push a list pattern using the most compact field value type
+        that produces the same cycle of values
+        """
+        form = self._optimizer.optimize(values)
+        if form is not None and form['choice'] == 'single':
+            ixn_field.update(Auto=False,
+                ActiveFieldChoice=field_choice,
+                ValueType='singleValue',
+                SingleValue=form['value'])
+        elif form is not None and form['choice'] == 'counter':
+            ixn_field.update(Auto=False,
+                ValueType='increment' if form['up'] is True else 'decrement',
+                ActiveFieldChoice=field_choice,
+                StartValue=form['start'],
+                StepValue=form['step'],
+                CountValue=form['count'])
+        else:
+            ixn_field.update(Auto=False,
+                ActiveFieldChoice=field_choice,
+                ValueType='valueList',
+                ValueList=values)
+
     def _configure_size(self, ixn_stream, size):
         """ Transform frameSize flows.size to /traffic/trafficItem[*]/configElement[*]/frameSize
         """
         if size is None:
             return
-        ixn_frame_size = ixn_stream.FrameSize
         args = {}
         if size.choice == 'fixed':
             args['Type'] = "fixed"
@@ -358,14 +732,13 @@ class TrafficItem(CustomField):
             args['RandomMax'] = size.random.max
         else:
             print('Warning - We need to implement this %s choice' %size.choice)
-        self._update(ixn_frame_size, **args)
+        self._defer(ixn_stream.href + '/frameSize', **args)
             
     def _configure_rate(self, ixn_stream, rate):
         """ Transform frameRate flows.rate to /traffic/trafficItem[*]/configElement[*]/frameRate
         """
         if rate is None:
             return
-        ixn_frame_rate = ixn_stream.FrameRate
         args = {}
         if rate.unit == 'line':
             args['Type'] = 'percentLineRate'
@@ -375,14 +748,13 @@ class TrafficItem(CustomField):
             args['Type'] = 'bitsPerSecond'
             args['BitRateUnitsType'] = TrafficItem._BIT_RATE_UNITS_TYPE[rate.unit]
         args['Rate'] = rate.value
-        self._update(ixn_frame_rate, **args)
+        self._defer(ixn_stream.href + '/frameRate', **args)
 
     def _configure_tx_control(self, ixn_stream, duration):
         """Transform duration flows.duration to /traffic/trafficItem[*]/configElement[*]/TransmissionControl
         """
         if duration is None:
             return
-        ixn_tx_control = ixn_stream.TransmissionControl
         args = {}
         if duration.choice == 'continuous':
             args['Type'] = 'continuous'
@@ -408,46 +780,160 @@ class TrafficItem(CustomField):
             args['EnableInterBurstGap'] = True if duration.burst.gap > 0 else False
             args['InterBurstGap'] = duration.burst.inter_burst_gap
             args['InterBurstGapUnits'] = duration.burst.inter_burst_gap_unit
-        self._update(ixn_tx_control, **args)
+        self._defer(ixn_stream.href + '/transmissionControl', **args)
 
     def transmit(self, request):
         """Set flow transmit
-        1) If start then start any device protocols that are traffic dependent
-        2) If start then generate and apply traffic
-        3) Execute requested transmit action (start|stop|pause|resume)
+        1) If start then start any device protocols that are not already started
+           or starting
+        2) If start then wait only for the topologies of device endpoints
+           that are still starting and for their gateways to resolve
+        3) If start then generate and apply traffic
+        4) If start then clear statistics or with clear_stats=False record
+           a statistics baseline instead
+        5) Execute requested transmit action (start|stop|pause|resume)
+
+        The actions are executed on the hrefs of the traffic items in batches
+        of at most _MAX_HREFS, see _get_hrefs.
         """
-        regex = ''
-        if request.flow_names is not None and len(request.flow_names) > 0:
-            regex = '^(%s)$' % '|'.join(request.flow_names)
+        hrefs = self._get_hrefs(request.flow_names)
         if request.state == 'start':
-            self._api._traffic_item.find(Name=regex, State='unapplied')
-            if len(self._api._topology.find()) > 0:
-                start = time.time()
-                self._api._ixnetwork.StartAllProtocols('sync')
-                self._api.info('protocols start %ssecs' % str(time.time() - start))
-                self._api.check_protocol_statistics()
-            if len(self._api._traffic_item) > 0:
-                start = time.time()
-                self._api._traffic_item.Generate()
-                self._api._traffic.Apply()
-                self._api.info('flow generate apply %ssecs' % str(time.time() - start))
+            self._prepare(request.flow_names, hrefs)
             self._api._start_capture()
-            if len(self._api._traffic_item) > 0:
+            if self._api._clear_stats is False:
+                start = time.time()
+                self._api.counters.set_baseline()
+                self._api.info('flow statistics baseline %ssecs' % str(time.time() - start))
+            else:
                 start = time.time()
                 self._api._ixnetwork.ClearStats(
                     ['waitForPortStatsRefresh', 'waitForTrafficStatsRefresh'])
+                self._api.counters.reset()
                 self._api.info('flow clear statistics %ssecs' % str(time.time() - start))
-        self._api._traffic_item.find(Name=regex)
         if request.state == 'start':
             start = time.time()
-            self._api._traffic_item.StartStatelessTrafficBlocking()
+            self._execute('startStatelessTrafficBlocking', hrefs)
             self._api.info('flow start %ssecs' % str(time.time() - start))
         elif request.state == 'stop':
-            self._api._traffic_item.StopStatelessTrafficBlocking()
+            self._execute('stopStatelessTrafficBlocking', hrefs)
         elif request.state == 'pause':
-            self._api._traffic_item.PauseStatelessTrafficBlocking(True)
+            self._execute('pauseStatelessTrafficBlocking', hrefs, True)
         elif request.state == 'resume':
-            self._api._traffic_item.PauseStatelessTrafficBlocking(False)
+            self._execute('pauseStatelessTrafficBlocking', hrefs, False)
+
+    def _prepare(self, flow_names, hrefs):
+        """Start the device protocols without waiting for them, wait only
+        for the topologies of the endpoints of the flows, their gateways and
+        their sessions and apply the traffic items of the hrefs.
+        The remaining topologies keep starting, see Protocol.wait.
+        Return True if anything was applied
+        """
+        protocol = self._api.protocol
+        protocol.start_async()
+        protocol.wait(protocol.get_endpoint_topologies(flow_names))
+        device_names = protocol.get_endpoint_devices(flow_names)
+        protocol.resolve_gateways(device_names)
+        protocol.wait_sessions(device_names)
+        return self._apply(hrefs)
+
+    def _get_hrefs(self, flow_names):
+        """Return the traffic item hrefs of the flows.
+        Configured flow names are resolved from ixn_objects without a server
+        request. Every other flow name is a regex pattern that is matched
+        against the names of all traffic items using one select.
+        If flow_names is None or empty return the hrefs of all traffic items.
+        """
+        if flow_names is not None and len(flow_names) > 0:
+            hrefs = [
+                self._api.ixn_objects.get(name) for name in flow_names
+                if name in self._configured
+            ]
+            if len(hrefs) == len(flow_names) and None not in hrefs:
+                return hrefs
+        matches = self._get_matcher(flow_names)
+        return [
+            traffic_item['href']
+            for traffic_item in self._select_traffic_items(['name'])
+            if matches(traffic_item['name'])
+        ]
+
+    def _get_matcher(self, flow_names):
+        """Return a function that returns True for a traffic item name that
+        is one of the configured flow names or matches one of the other flow
+        names as a regex pattern.
+        A flow name that is not a valid regex is matched exactly.
+        """
+        if flow_names is None or len(flow_names) == 0:
+            return lambda name: True
+        names = set([name for name in flow_names if name in self._configured])
+        patterns = []
+        for name in flow_names:
+            if name in self._configured:
+                continue
+            try:
+                re.compile(name)
+                patterns.append('(?:%s)' % name)
+            except re.error:
+                patterns.append(re.escape(name))
+        regex = None
+        if len(patterns) > 0:
+            regex = re.compile('^(%s)$' % '|'.join(patterns))
+        return lambda name: name in names or (
+            regex is not None and regex.match(name) is not None)
+
+    def _execute(self, operation, hrefs, *args):
+        """Execute a /traffic/trafficItem operation on the hrefs in batches
+        of at most _MAX_HREFS hrefs
+        """
+        url = '%s/traffic/trafficItem/operations/%s' % (
+            self._api._ixnetwork.href, operation.lower())
+        for i in range(0, len(hrefs), TrafficItem._MAX_HREFS):
+            payload = {'arg1': hrefs[i:i + TrafficItem._MAX_HREFS]}
+            for j in range(len(args)):
+                payload['arg%s' % (j + 2)] = args[j]
+            self._api._ixnetwork._connection._execute(url, payload)
+
+    def _apply(self, hrefs):
+        """Apply only what changed since the last apply
+        - nothing changed and nothing is unapplied: skip generate and apply
+        - only rate or size changed: apply the changes on the fly
+        - otherwise generate only the changed or unapplied traffic items
+          and apply the traffic
+        Return True if anything was applied
+        """
+        start = time.time()
+        hrefs = set(hrefs)
+        unapplied = {}
+        for traffic_item in self._select_traffic_items(['name', 'state']):
+            if traffic_item['href'] in hrefs and traffic_item['state'] == 'unapplied':
+                unapplied[traffic_item['name']] = traffic_item['href']
+        generate = [
+            name for name in unapplied if self._changes.get(name) != 'on_the_fly'
+        ]
+        on_the_fly = [
+            name for name, kind in self._changes.items() if kind == 'on_the_fly'
+        ]
+        if len(generate) == 0 and len(on_the_fly) == 0:
+            self._api.info('flow generate apply skipped, nothing changed')
+            return False
+        if len(generate) == 0:
+            try:
+                self._api._traffic.ApplyOnTheFlyTrafficChanges()
+                self._changes = {}
+                self._api.info('flow apply on the fly %ssecs' % str(time.time() - start))
+                return True
+            except Exception as e:
+                self._api.warning('flow apply on the fly failed %s' % e)
+                generate = on_the_fly
+        self._execute('generate', [
+            unapplied[name] if name in unapplied else self._api.ixn_objects[name]
+            for name in generate
+        ])
+        self._api._traffic.Apply()
+        self._changes = {}
+        self._api.info('flow generate %s apply %ssecs' %
+                       (len(generate), str(time.time() - start)))
+        return True
 
     def _set_result_value(self, row, column_name, column_value, column_type = str):
         if len(self._column_names) > 0 and column_name not in self._column_names:
@@ -479,21 +965,25 @@ class TrafficItem(CustomField):
         else:
             return 'stopped'
             
-    def results(self, request):
+    def results(self, request, baseline=True):
         """Return flow results
+        Counters are relative to the selected baseline unless baseline is False
+
+        If ingress_result_names are requested there is one row per flow and
+        ingress value with a column per ingress_result_name, see _ingress_results.
         """
         if request.column_names is None:
             self._column_names = []
         else:
             self._column_names = request.column_names
-        filter = {
-            'property': 'name',
-            'regex': '.*'
-        }
-        if request is not None and request.flow_names is not None and len(request.flow_names) > 0:
-            filter['regex'] = '^(%s)$' % '|'.join(request.flow_names)
+        matches = self._get_matcher(request.flow_names)
+        ingress_result_names = getattr(request, 'ingress_result_names', None)
+        if ingress_result_names is not None and len(ingress_result_names) > 0:
+            return self._ingress_results(ingress_result_names, matches, baseline)
         flow_rows = {}
-        for traffic_item in self._api.select_traffic_items(traffic_item_filters=[filter]).values():
+        for traffic_item in self._api.select_traffic_items().values():
+            if matches(traffic_item['name']) is False:
+                continue
             flow_row = {}
             self._set_result_value(flow_row, 'name', traffic_item['name'])
             self._set_result_value(flow_row, 'transmit', self._get_state(traffic_item['state']))
@@ -501,18 +991,119 @@ class TrafficItem(CustomField):
             self._set_result_value(flow_row, 'port_rx', ' '.join(traffic_item['highLevelStream'][0]['rxPortNames']))
             flow_rows[traffic_item['name']] = flow_row
         try:
-            table = self._api.assistant.StatViewAssistant('Traffic Item Statistics')
-            table.AddRowFilter('Traffic Item', StatViewAssistant.REGEX, filter['regex'])
-            for row in table.Rows:
-                flow_row = flow_rows[row['Traffic Item']]
-                self._set_result_value(flow_row, 'frames_tx', row['Tx Frames'], int)
-                self._set_result_value(flow_row, 'frames_rx', row['Rx Frames'], int)
-                self._set_result_value(flow_row, 'bytes_rx', row['Rx Bytes'], int)
-                self._set_result_value(flow_row, 'frames_tx_rate', row['Tx Frame Rate'], float)
-                self._set_result_value(flow_row, 'frames_rx_rate', row['Rx Frame Rate'], float)
-                self._set_result_value(flow_row, 'bytes_tx_rate', row['Tx Rate (Bps)'], float)
-                self._set_result_value(flow_row, 'bytes_rx_rate', row['Rx Rate (Bps)'], float)
-                self._set_result_value(flow_row, 'loss', row['Loss %'], float)
+            view = StatView(self._api, 'Traffic Item Statistics')
+            for row in view.rows():
+                flow_row = flow_rows.get(row['Traffic Item'])
+                if flow_row is None:
+                    continue
+                for column_name, (caption, column_type) in TrafficItem._RESULT_CAPTIONS.items():
+                    self._set_result_value(flow_row, column_name, row[caption], column_type)
         except Exception as e:
             self._api.add_error(e)
+        if baseline is True:
+            self._api.counters.apply_baseline('flow', flow_rows)
         return flow_rows.values()
+
+    def _ingress_results(self, ingress_result_names, matches, baseline=True):
+        """Return the rows of the 'Flow Statistics' view, one row per flow
+        and combination of ingress values.
+
+        Every row has the name, a column per ingress_result_name and the
+        requested counters. The column of an ingress_result_name is the
+        view column whose caption is the display name of the tracked field.
+        Counters are relative to the ingress rows of the selected baseline
+        unless baseline is False, see _read_ingress_counters.
+        """
+        stat_columns = [
+            column_name for column_name in TrafficItem._RESULT_CAPTIONS
+            if len(self._column_names) == 0 or column_name in self._column_names
+        ]
+        flow_rows = []
+        try:
+            for key, flow_row in self._ingress_rows(ingress_result_names, matches, stat_columns):
+                if baseline is True:
+                    self._api.counters.apply_baseline('ingress', {key: flow_row})
+                flow_rows.append(flow_row)
+        except Exception as e:
+            self._api.add_error(e)
+        return flow_rows
+
+    def _read_ingress_counters(self, counters):
+        """Return a dict of ingress row keys to the raw counters of the row,
+        empty if no flow tracks an ingress_result_name
+        """
+        if len(self._get_tracked_names()) == 0:
+            return {}
+        ingress_counters = {}
+        for key, flow_row in self._ingress_rows([], lambda name: True, counters):
+            ingress_counters[key] = dict(
+                (counter, flow_row[counter]) for counter in counters)
+        return ingress_counters
+
+    def _get_tracked_names(self):
+        tracked_names = set()
+        for names in self._ingress.values():
+            tracked_names.update(names.keys())
+        return sorted(tracked_names)
+
+    def _ingress_rows(self, ingress_result_names, matches, stat_columns, page_size=1000):
+        """Yield (key, row) for every matching row of the 'Flow Statistics'
+        view, the view is read page by page without a csv snapshot.
+
+        The key is the tuple of the ports, the traffic item and the values
+        of every tracked field of the view row. It identifies the row
+        independently of the requested ingress_result_names so that rows
+        can be matched with the rows of a baseline.
+        """
+        tracked_names = self._get_tracked_names()
+        display_names = self._select_display_names(
+            sorted(set(tracked_names).union(ingress_result_names)))
+        projection = None
+        view = StatView(self._api, 'Flow Statistics', page_size=page_size)
+        for rows in view.chunks():
+            if projection is None:
+                captions = view.column_captions
+                name_index = captions.index('Traffic Item')
+                key_captions = [caption for caption in ['Tx Port', 'Rx Port', 'Traffic Item']
+                                if caption in captions]
+                for name in tracked_names:
+                    caption = display_names[name]
+                    if caption in captions and caption not in key_captions:
+                        key_captions.append(caption)
+                key_indexes = [captions.index(caption) for caption in key_captions]
+                projection = [(name, captions.index(display_names[name]), str)
+                              for name in ingress_result_names]
+                for column_name in stat_columns:
+                    caption, column_type = TrafficItem._RESULT_CAPTIONS[column_name]
+                    projection.append((column_name, captions.index(caption), column_type))
+            for row in rows:
+                if matches(row[name_index]) is False:
+                    continue
+                flow_row = {'name': row[name_index]}
+                for column_name, index, column_type in projection:
+                    try:
+                        value = column_type(row[index])
+                    except ValueError:
+                        value = 0 if column_type in [int, float] else row[index]
+                    flow_row[column_name] = value
+                yield tuple(row[index] for index in key_indexes), flow_row
+
+    def _select_display_names(self, ingress_result_names):
+        """Return a dict of ingress_result_names to the display names of
+        their tracked fields using one select
+        """
+        root = self._api._ixnetwork.href
+        payload = {'selects': []}
+        for name in ingress_result_names:
+            payload['selects'].append({
+                'from': self._api.get_ixn_href(name)[len(root):],
+                'properties': ['displayName'],
+                'children': [],
+                'inlines': []
+            })
+        url = '%s/operations/select?xpath=true' % root
+        results = self._api._ixnetwork._connection._execute(url, payload)
+        display_names = {}
+        for i in range(len(ingress_result_names)):
+            display_names[ingress_result_names[i]] = results[i]['displayName']
+        return display_names
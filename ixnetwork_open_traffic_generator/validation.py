@@ -4,12 +4,16 @@ import json
 class Validation(object):
     """Validate the configuration
 
-    Ensures entire configuration has unique names
+    Ensures entire configuration has unique names and that the route count
+    of every bgpv4 route range fits in the device and address space before
+    anything is sent to the server
 
     Args
     ----
     - ixnetworkapi (IxNetworkApi): instance of the ixnetworkapi class
     """
+    _MAX_ROUTES = 16000000
+
     def __init__(self, ixnetworkapi):
         self._api = ixnetworkapi
     
@@ -18,6 +22,67 @@ class Validation(object):
         self.__check_config_objects(self._api.config)
         if len(self._unique_name_errors) > 0:
             raise NameError(', '.join(self._unique_name_errors))
+        self._route_errors = []
+        self.__check_route_ranges(self._api.config)
+        if len(self._route_errors) > 0:
+            raise ValueError(', '.join(self._route_errors))
+
+    def __check_route_ranges(self, config):
+        """Route counts are checked here so that a config with millions of
+        routes fails before any import is built
+        """
+        if config is None or config.devices is None:
+            return
+        total = 0
+        for device in config.devices:
+            if device.choice != 'bgpv4' or device.bgpv4 is None:
+                continue
+            route_ranges, route_count = self._api._route_ranges.get(
+                device.bgpv4.name, ([], 1))
+            if len(route_ranges) == 0:
+                continue
+            if isinstance(route_count, int) is False or route_count < 1:
+                self._route_errors.append(
+                    '%s.route_count_per_device: "%s" must be a positive integer'
+                    % (device.bgpv4.name, route_count))
+                continue
+            for route_range in route_ranges:
+                if route_range.name in self._api._config_objects:
+                    self._route_errors.append('%s.name: "%s" is not unique' %
+                        (route_range.__class__.__name__, route_range.name))
+                    continue
+                self._api._config_objects[route_range.name] = route_range
+                count = device.device_count * route_count
+                total += count
+                self.__check_address_space(route_range, count)
+        if total > Validation._MAX_ROUTES:
+            self._route_errors.append(
+                'total route count %s exceeds the maximum of %s' %
+                (total, Validation._MAX_ROUTES))
+
+    def __check_address_space(self, route_range, count):
+        """The networks of a route range with a fixed address and prefix
+        must not wrap past 255.255.255.255
+        """
+        address = route_range.address
+        prefix = route_range.prefix
+        if address is None or prefix is None:
+            return
+        if address.choice != 'fixed' or prefix.choice != 'fixed':
+            return
+        try:
+            octets = [int(octet) for octet in address.fixed.split('.')]
+            start = (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3]
+            size = 1 << (32 - int(prefix.fixed))
+        except (ValueError, IndexError, AttributeError):
+            self._route_errors.append(
+                '%s: "%s/%s" is not a valid ipv4 network' %
+                (route_range.name, address.fixed, prefix.fixed))
+            return
+        if start + count * size > 1 << 32:
+            self._route_errors.append(
+                '%s: %s networks of /%s starting at %s exceed the ipv4 address space'
+                % (route_range.name, count, prefix.fixed, address.fixed))
 
     def __check_config_objects(self, config_item):
         if config_item is None:
@@ -2,6 +2,7 @@ import json
 from jsonpath_ng.ext import parse
 import time
 import re
+from ixnetwork_restpy import StatViewAssistant
 
 
 class Vport(object):
@@ -49,8 +50,27 @@ class Vport(object):
         'pfc_class_1_frames_rx', 'pfc_class_2_frames_rx',
         'pfc_class_3_frames_rx', 'pfc_class_4_frames_rx',
         'pfc_class_5_frames_rx', 'pfc_class_6_frames_rx',
-        'pfc_class_7_frames_rx'
+        'pfc_class_7_frames_rx', 'capture_hardware_enabled',
+        'capture_software_enabled', 'capture_state', 'capture_frames'
     ]
+    _RESULT_CAPTIONS = {
+        'frames_tx': ('Frames Tx.', int),
+        'frames_rx': ('Valid Frames Rx.', int),
+        'frames_tx_rate': ('Frames Tx. Rate', float),
+        'frames_rx_rate': ('Valid Frames Rx. Rate', float),
+        'bytes_tx': ('Bytes Tx.', int),
+        'bytes_rx': ('Bytes Rx.', int),
+        'bytes_tx_rate': ('Bytes Tx. Rate', float),
+        'bytes_rx_rate': ('Bytes Rx. Rate', float),
+        'pfc_class_0_frames_rx': ('Rx Pause Priority Group 0 Frames', int),
+        'pfc_class_1_frames_rx': ('Rx Pause Priority Group 1 Frames', int),
+        'pfc_class_2_frames_rx': ('Rx Pause Priority Group 2 Frames', int),
+        'pfc_class_3_frames_rx': ('Rx Pause Priority Group 3 Frames', int),
+        'pfc_class_4_frames_rx': ('Rx Pause Priority Group 4 Frames', int),
+        'pfc_class_5_frames_rx': ('Rx Pause Priority Group 5 Frames', int),
+        'pfc_class_6_frames_rx': ('Rx Pause Priority Group 6 Frames', int),
+        'pfc_class_7_frames_rx': ('Rx Pause Priority Group 7 Frames', int),
+    }
 
     def __init__(self, ixnetworkapi):
         self._api = ixnetworkapi
@@ -480,15 +500,52 @@ class Vport(object):
             else:
                 row[column_type] = column_value
 
-    def results(self, request):
+    def _set_capture_result(self, port_row, capture):
+        """Set the capture columns from the /vport/capture properties
+        returned by select_vports
+        """
+        if capture is None:
+            self._set_result_value(port_row, 'capture', 'stopped')
+            return
+        running = capture['isCaptureRunning'] is True or capture[
+            'isControlCaptureRunning'] is True
+        self._set_result_value(port_row, 'capture',
+                               'started' if running is True else 'stopped')
+        self._set_result_value(port_row, 'capture_hardware_enabled',
+                               capture['hardwareEnabled'], bool)
+        self._set_result_value(port_row, 'capture_software_enabled',
+                               capture['softwareEnabled'], bool)
+        self._set_result_value(port_row, 'capture_state',
+                               capture['dataCaptureState'])
+        frames = 0
+        for counter in ['dataPacketCounter', 'controlPacketCounter']:
+            try:
+                frames += int(capture[counter])
+            except:
+                pass
+        self._set_result_value(port_row, 'capture_frames', frames, int)
+
+    def results(self, request, baseline=True):
         """Return port results
+
+        Only the requested columns of the 'Port Statistics' view are
+        converted and the view is not read at all if no statistics
+        columns are requested.
+        Counters are relative to the selected baseline unless baseline is False.
         """
         if request.column_names is None:
             self._column_names = []
         else:
             self._column_names = request.column_names
+        port_names = getattr(request, 'port_names', None)
+        vport_filters = []
+        if port_names is not None and len(port_names) > 0:
+            vport_filters.append({
+                'property': 'name',
+                'regex': '^(%s)$' % '|'.join([re.escape(name) for name in port_names])
+            })
         port_rows = {}
-        for vport in self._api.select_vports().values():
+        for vport in self._api.select_vports(vport_filters=vport_filters).values():
             port_row = {}
             self._set_result_value(port_row, 'name', vport['name'])
             location = vport['location']
@@ -502,52 +559,36 @@ class Vport(object):
             self._set_result_value(
                 port_row, 'link', 'up'
                 if vport['connectionState'] == 'connectedLinkUp' else 'down')
-            self._set_result_value(port_row, 'capture', 'stopped')
+            self._set_capture_result(port_row, vport.get('capture'))
             port_rows[vport['name']] = port_row
+        stat_columns = [
+            column_name for column_name in Vport._RESULT_CAPTIONS
+            if len(self._column_names) == 0 or column_name in self._column_names
+        ]
+        if len(stat_columns) == 0 or len(port_rows) == 0:
+            return port_rows.values()
         try:
             table = self._api.assistant.StatViewAssistant('Port Statistics')
-            for row in table.Rows:
-                port_row = port_rows[row['Port Name']]
-                self._set_result_value(port_row, 'frames_tx',
-                                       row['Frames Tx.'], int)
-                self._set_result_value(port_row, 'frames_rx',
-                                       row['Valid Frames Rx.'], int)
-                self._set_result_value(port_row, 'frames_tx_rate',
-                                       row['Frames Tx. Rate'], float)
-                self._set_result_value(port_row, 'frames_rx_rate',
-                                       row['Valid Frames Rx. Rate'], float)
-                self._set_result_value(port_row, 'bytes_tx', row['Bytes Tx.'],
-                                       int)
-                self._set_result_value(port_row, 'bytes_rx', row['Bytes Rx.'],
-                                       int)
-                self._set_result_value(port_row, 'bytes_tx_rate',
-                                       row['Bytes Tx. Rate'], float)
-                self._set_result_value(port_row, 'bytes_rx_rate',
-                                       row['Bytes Rx. Rate'], float)
-                self._set_result_value(port_row, 'pfc_class_0_frames_rx',
-                                       row['Rx Pause Priority Group 0 Frames'],
-                                       int)
-                self._set_result_value(port_row, 'pfc_class_1_frames_rx',
-                                       row['Rx Pause Priority Group 1 Frames'],
-                                       int)
-                self._set_result_value(port_row, 'pfc_class_2_frames_rx',
-                                       row['Rx Pause Priority Group 2 Frames'],
-                                       int)
-                self._set_result_value(port_row, 'pfc_class_3_frames_rx',
-                                       row['Rx Pause Priority Group 3 Frames'],
-                                       int)
-                self._set_result_value(port_row, 'pfc_class_4_frames_rx',
-                                       row['Rx Pause Priority Group 4 Frames'],
-                                       int)
-                self._set_result_value(port_row, 'pfc_class_5_frames_rx',
-                                       row['Rx Pause Priority Group 5 Frames'],
-                                       int)
-                self._set_result_value(port_row, 'pfc_class_6_frames_rx',
-                                       row['Rx Pause Priority Group 6 Frames'],
-                                       int)
-                self._set_result_value(port_row, 'pfc_class_7_frames_rx',
-                                       row['Rx Pause Priority Group 7 Frames'],
-                                       int)
+            if len(vport_filters) > 0:
+                table.AddRowFilter('Port Name', StatViewAssistant.REGEX,
+                                   vport_filters[0]['regex'])
+            rows = table.Rows
+            captions = rows.Columns
+            name_index = captions.index('Port Name')
+            projection = []
+            for column_name in stat_columns:
+                caption, column_type = Vport._RESULT_CAPTIONS[column_name]
+                projection.append(
+                    (column_name, captions.index(caption), column_type))
+            for raw_row in rows.RawData:
+                port_row = port_rows.get(raw_row[name_index])
+                if port_row is None:
+                    continue
+                for column_name, index, column_type in projection:
+                    self._set_result_value(port_row, column_name,
+                                           raw_row[index], column_type)
         except:
             pass
+        if baseline is True:
+            self._api.counters.apply_baseline('port', port_rows)
         return port_rows.values()
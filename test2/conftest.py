@@ -7,6 +7,7 @@ API_SERVER_PORT = 11149
 TX_PORT_LOCATION = '10.39.35.12;11;03'
 RX_PORT_LOCATION = '10.39.35.12;11;04'
 LICENSE_SERVERS = ['10.39.35.12']
+WARM_SESSIONS = 1
 # TX_PORT_LOCATION = '10.36.66.226;01;01' # vmone
 # RX_PORT_LOCATION = '10.36.66.226;01;02' # vmone
 # LICENSE_SERVERS = []
@@ -50,17 +51,33 @@ def serializer(request):
 
 
 @pytest.fixture(scope='session')
-def api():
+def session_pool():
+    """Returns a pool of warm sessions on the IxNetwork API Server
+    Set WARM_SESSIONS to 0 to create and remove a session per test run
+    """
+    if WARM_SESSIONS == 0:
+        yield None
+        return
+    from ixnetwork_open_traffic_generator.sessionpool import SessionPool
+    pool = SessionPool(API_SERVER,
+                       port=API_SERVER_PORT,
+                       warm_sessions=WARM_SESSIONS)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope='session')
+def api(session_pool):
     """Change this to the ip address and rest port of the
     IxNetwork API Server to use for the api test fixture
     """
     from ixnetwork_open_traffic_generator.ixnetworkapi import IxNetworkApi
     api = IxNetworkApi(API_SERVER,
                        port=API_SERVER_PORT,
-                       license_servers=LICENSE_SERVERS)
+                       license_servers=LICENSE_SERVERS,
+                       session_pool=session_pool)
     yield api
-    if api.assistant is not None:
-        api.assistant.Session.remove()
+    api.close()
 
 
 @pytest.fixture(scope='session')
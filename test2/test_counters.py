@@ -0,0 +1,105 @@
+import pytest
+from ixnetwork_open_traffic_generator.counters import Counters, _Samples
+
+
+class Results(object):
+    """Raw port or flow results returned by a fake vport or traffic_item
+    """
+    def __init__(self, rows, ingress_rows=None):
+        self.rows = rows
+        self.ingress_rows = {} if ingress_rows is None else ingress_rows
+
+    def results(self, request, baseline=True):
+        return [dict(row) for row in self.rows]
+
+    def _read_ingress_counters(self, counters):
+        return dict((key, dict(row)) for key, row in self.ingress_rows.items())
+
+
+class Api(object):
+    """A fake api with the raw counters read by Counters
+    """
+    def __init__(self, port_rows, flow_rows, ingress_rows=None):
+        self.vport = Results(port_rows)
+        self.traffic_item = Results(flow_rows, ingress_rows)
+
+    def _dict_to_obj(self, source):
+        return source
+
+
+def test_counter_deltas():
+    """Demonstrates client side deltas, rates and loss computed from
+    two raw counter samples
+    """
+    samples = _Samples(['frames_tx', 'frames_rx', 'bytes_rx'], 10, loss=True)
+    samples.add(10.0, [
+        {'name': 'f1', 'frames_tx': 100, 'frames_rx': 100, 'bytes_rx': 6400},
+        {'name': 'f2', 'frames_tx': 0, 'frames_rx': 0, 'bytes_rx': 0}
+    ])
+    samples.add(12.0, [
+        {'name': 'f1', 'frames_tx': 300, 'frames_rx': 250, 'bytes_rx': 9600},
+        {'name': 'f2', 'frames_tx': 0, 'frames_rx': 0, 'bytes_rx': 0}
+    ])
+    rows = samples.rows(*samples.delta(-2, -1))
+    assert(rows[0]['frames_tx_delta'] == 200)
+    assert(rows[0]['frames_rx_rate'] == 75.0)
+    assert(rows[0]['frames_lost'] == 50)
+    assert(rows[0]['loss'] == 25.0)
+    assert(rows[1]['loss'] == 0.0)
+
+
+def test_counter_names_change():
+    """A change in the set of names discards the previous samples
+    """
+    samples = _Samples(['frames_tx', 'frames_rx'], 10)
+    samples.add(1.0, [{'name': 'p1', 'frames_tx': 1, 'frames_rx': 1}])
+    samples.add(2.0, [{'name': 'p2', 'frames_tx': 1, 'frames_rx': 1}])
+    assert(len(samples.values) == 1)
+    assert(samples.index == {'p2': 0})
+
+
+def test_counter_baselines():
+    """Demonstrates results relative to named baselines of raw counters
+    """
+    api = Api([{'name': 'p1', 'frames_tx': 100}],
+              [{'name': 'f1', 'frames_tx': 100, 'frames_rx': 90}])
+    counters = Counters(api)
+    counters.set_baseline('phase 1')
+    api.traffic_item.rows = [{'name': 'f1', 'frames_tx': 300, 'frames_rx': 250}]
+    counters.set_baseline('phase 2')
+    flow_rows = {'f1': {'frames_tx': 400, 'frames_rx': 340, 'loss': 15.0}}
+    counters.apply_baseline('flow', flow_rows)
+    assert(flow_rows['f1'] == {'frames_tx': 100, 'frames_rx': 90, 'loss': 10.0})
+    counters.select_baseline('phase 1')
+    port_rows = {'p1': {'frames_tx': 50}}
+    counters.apply_baseline('port', port_rows)
+    assert(port_rows['p1']['frames_tx'] == 50)
+    counters.select_baseline(None)
+    flow_rows = {'f1': {'frames_tx': 400}}
+    counters.apply_baseline('flow', flow_rows)
+    assert(flow_rows['f1']['frames_tx'] == 400)
+
+
+def test_counter_ingress_baselines():
+    """Demonstrates ingress results relative to the baseline row with the
+    same ports, flow and tracked values
+    """
+    counters = Counters(Api([], [], {
+        ('p1', 'p2', 'f1', '12001'): {'frames_tx': 100, 'frames_rx': 100},
+        ('p1', 'p2', 'f1', '12003'): {'frames_tx': 200, 'frames_rx': 150}
+    }))
+    counters.set_baseline()
+    ingress_rows = {
+        ('p1', 'p2', 'f1', '12001'): {'name': 'f1', 'frames_tx': 150, 'frames_rx': 140, 'loss': 6.0},
+        ('p1', 'p2', 'f1', '12003'): {'name': 'f1', 'frames_tx': 300, 'frames_rx': 250, 'loss': 16.0},
+        ('p1', 'p2', 'f1', '12005'): {'name': 'f1', 'frames_tx': 10, 'frames_rx': 10, 'loss': 0.0}
+    }
+    counters.apply_baseline('ingress', ingress_rows)
+    assert(ingress_rows[('p1', 'p2', 'f1', '12001')]['frames_tx'] == 50)
+    assert(ingress_rows[('p1', 'p2', 'f1', '12001')]['loss'] == 20.0)
+    assert(ingress_rows[('p1', 'p2', 'f1', '12003')]['frames_rx'] == 100)
+    assert(ingress_rows[('p1', 'p2', 'f1', '12005')]['frames_tx'] == 10)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
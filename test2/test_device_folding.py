@@ -0,0 +1,58 @@
+import pytest
+from abstract_open_traffic_generator.config import Config
+from abstract_open_traffic_generator.control import State, ConfigState
+from abstract_open_traffic_generator.device import Device, Ipv4, Ethernet, Pattern
+from abstract_open_traffic_generator.flow import Flow, TxRx, DeviceTxRx, \
+    Header, Size, Rate, Duration, FixedPackets
+from abstract_open_traffic_generator.flow import Ipv4 as FlowIpv4
+
+
+def test_device_folding(options, tx_port, rx_port, session_pool):
+    """Demonstrates the following:
+    - 100 single devices per port are folded into one device group per port
+    - a flow between a subset of the devices uses their slices as endpoints
+    - device results are reported per original device
+    """
+    from ixnetwork_open_traffic_generator.ixnetworkapi import IxNetworkApi
+    from .conftest import API_SERVER, API_SERVER_PORT, LICENSE_SERVERS
+    api = IxNetworkApi(API_SERVER,
+                       port=API_SERVER_PORT,
+                       license_servers=LICENSE_SERVERS,
+                       session_pool=session_pool,
+                       fold_devices=True)
+    devices = []
+    for port, network in [(tx_port, 1), (rx_port, 2)]:
+        for i in range(1, 101):
+            devices.append(
+                Device(name='%s Device %s' % (port.name, i),
+                       container_name=port.name,
+                       device_count=1,
+                       choice=Ipv4(name='%s Ipv4 %s' % (port.name, i),
+                                   address=Pattern('10.%s.0.%s' % (network, i)),
+                                   prefix=Pattern('16'),
+                                   gateway=Pattern('10.%s.0.%s' % (3 - network, i)),
+                                   ethernet=Ethernet(name='%s Eth %s' % (port.name, i)))))
+    flow = Flow(name='Folded Flow',
+                tx_rx=TxRx(DeviceTxRx(
+                    tx_device_names=[devices[0].name, devices[1].name],
+                    rx_device_names=[devices[100].name, devices[101].name])),
+                packet=[Header(FlowIpv4())],
+                size=Size(128),
+                rate=Rate(unit='pps', value=1000),
+                duration=Duration(FixedPackets(packets=1000)))
+    config = Config(ports=[tx_port, rx_port],
+                    devices=devices,
+                    flows=[flow],
+                    options=options)
+    api.set_state(State(ConfigState(config=config, state='set')))
+    assert(api.ngpf.get_device_slice(devices[1].name)[1:] == (2, 1))
+    results = api.get_device_results({
+        'device_names': [devices[0].name, devices[100].name],
+        'column_names': ['name', 'sessions_total']
+    })
+    assert(len(results) == 2)
+    api.close()
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
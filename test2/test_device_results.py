@@ -0,0 +1,35 @@
+import pytest
+import abstract_open_traffic_generator.config as config
+import abstract_open_traffic_generator.control as control
+
+
+def test_device_results(serializer, api, options, tx_port, rx_port,
+                        b2b_devices):
+    """Demonstrates the following:
+    - Polling the session state of devices with a subset of columns
+    - Use pandas to end the script when all sessions are up
+    """
+    configuration = config.Config(ports=[tx_port, rx_port],
+                                  devices=b2b_devices,
+                                  options=options)
+    api.set_state(
+        control.State(control.ConfigState(config=configuration,
+                                          state='set')))
+    api.set_state(
+        control.State(control.FlowTransmitState(state='start')))
+
+    from pandas import DataFrame
+    request = {
+        'device_names': None,
+        'column_names': ['name', 'protocol', 'sessions_up', 'sessions_total']
+    }
+    while True:
+        results = api.get_device_results(request)
+        df = DataFrame.from_dict(results)
+        print(df)
+        if df.sessions_up.sum() == df.sessions_total.sum():
+            break
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -47,5 +47,61 @@ def test_device_ipv4value_list(serializer, api):
     api.set_state(State(ConfigState(config=config, state='set')))
 
 
+@pytest.mark.ConfigTest
+def test_device_ipv4_counter(serializer, api):
+    """Test the creation of ipv4 counter and random properties
+    """
+    port = Port('port 1')
+    config = Config(ports=[port])
+    config.devices.append(
+        Device(name='device',
+               container_name=port.name,
+               device_count=10000,
+               choice=Ipv4(name='ipv4',
+                           address=Pattern(Counter(start='1.1.1.1',
+                                                   step='0.0.0.1')),
+                           prefix=Pattern('16'),
+                           gateway=Pattern(Counter(start='1.1.0.1',
+                                                   step='0.0.0.0')),
+                           ethernet=Ethernet(
+                               name='eth',
+                               mac=Pattern(
+                                   Counter(start='00:00:aa:00:00:01',
+                                           step='00:00:00:00:00:01')),
+                               mtu=Pattern(
+                                   Random(min='1200', max='1500',
+                                          step=100))))))
+    api.set_state(State(ConfigState(config=config, state='set')))
+
+
+@pytest.mark.ConfigTest
+def test_device_bgpv4_route_range(serializer, api):
+    """Test the creation of 1M bgpv4 routes using one counter based
+    prefix pool per route range
+    """
+    port = Port('port 1')
+    config = Config(ports=[port])
+    config.devices.append(
+        Device(name='device',
+               container_name=port.name,
+               device_count=10,
+               choice=Bgpv4(name='bgpv4',
+                            ipv4=Ipv4(name='ipv4',
+                                      address=Pattern(
+                                          Counter(start='1.1.1.2',
+                                                  step='0.0.0.1')),
+                                      prefix=Pattern('24'),
+                                      gateway=Pattern('1.1.1.1'),
+                                      ethernet=Ethernet(name='eth')))))
+    api.set_route_ranges('bgpv4', [
+        Bgpv4RouteRange(name='route range',
+                        address=Pattern('20.0.0.0'),
+                        prefix=Pattern('32'),
+                        next_hop_address=Pattern('1.1.1.1'))
+    ], route_count_per_device=100000)
+    api.set_state(State(ConfigState(config=config, state='set')))
+    api.set_route_ranges('bgpv4', [])
+
+
 if __name__ == '__main__':
     pytest.main(['-s', __file__])
@@ -0,0 +1,39 @@
+import pytest
+import abstract_open_traffic_generator.control as control
+import abstract_open_traffic_generator.result as result
+
+
+def test_fanout(serializer, b2b_port_flow_config, tx_port, rx_port):
+    """Demonstrates applying the same config to two sessions concurrently
+    and retrieving the merged port results tagged by session
+    """
+    from ixnetwork_open_traffic_generator.ixnetworkapi import IxNetworkApi
+    from ixnetwork_open_traffic_generator.fanout import FanOut
+    from .conftest import API_SERVER, API_SERVER_PORT, LICENSE_SERVERS
+    apis = {}
+    for name in ['session a', 'session b']:
+        apis[name] = IxNetworkApi(API_SERVER,
+                                  port=API_SERVER_PORT,
+                                  license_servers=LICENSE_SERVERS)
+    port_locations = {
+        'session b': {
+            tx_port.name: None,
+            rx_port.name: None
+        }
+    }
+    fanout = FanOut(apis, port_locations=port_locations)
+    try:
+        fanout.set_state(
+            control.State(
+                control.ConfigState(config=b2b_port_flow_config,
+                                    state='set')))
+        results = fanout.get_port_results(
+            result.PortRequest(column_names=['name', 'location']))
+        assert(len(results) == 4)
+        assert(set([row['session'] for row in results]) == set(apis.keys()))
+    finally:
+        fanout.close()
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
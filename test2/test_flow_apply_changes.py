@@ -0,0 +1,30 @@
+import pytest
+import copy
+from abstract_open_traffic_generator.flow import Rate
+from abstract_open_traffic_generator.control import *
+
+
+def test_flow_apply_changes(api, b2b_port_flow_config):
+    """Demonstrates the following:
+    - An unchanged flow is not reconfigured, generated or applied again
+    - A rate change is applied on the fly
+    """
+    config = copy.deepcopy(b2b_port_flow_config)
+    flow = config.flows[0]
+    api.set_state(State(ConfigState(config=config, state='set')))
+    api.set_state(State(FlowTransmitState(state='start')))
+    api.set_state(State(FlowTransmitState(state='stop')))
+
+    api.set_state(State(ConfigState(config=config, state='set')))
+    assert(len(api.traffic_item.changes) == 0)
+
+    flow.rate = Rate(unit='pps', value=2000)
+    api.set_state(State(ConfigState(config=config, state='set')))
+    assert(api.traffic_item.changes == {flow.name: 'on_the_fly'})
+    api.set_state(State(FlowTransmitState(state='start')))
+    assert(len(api.traffic_item.changes) == 0)
+    api.set_state(State(FlowTransmitState(state='stop')))
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -0,0 +1,40 @@
+import pytest
+from abstract_open_traffic_generator.flow import *
+from abstract_open_traffic_generator.config import *
+from abstract_open_traffic_generator.control import *
+
+
+def test_flow_clone(api, options, tx_port, rx_port):
+    """Demonstrates the following:
+    - Flows with the same shape are created by duplicating a prototype
+    - Every copy is named and configured with its own field values and rate
+    """
+    endpoint = PortTxRx(tx_port_name=tx_port.name, rx_port_name=rx_port.name)
+    flows = []
+    for i in range(1, 11):
+        flows.append(
+            Flow(name='Clone Flow %s' % i,
+                 tx_rx=TxRx(endpoint),
+                 packet=[
+                     Header(Ethernet()),
+                     Header(Ipv4(src=Pattern('1.1.1.%s' % i)))
+                 ],
+                 size=Size(128),
+                 rate=Rate(unit='pps', value=100 * i),
+                 duration=Duration(FixedPackets(packets=1000))))
+    config = Config(ports=[tx_port, rx_port], flows=flows, options=options)
+    api.set_state(State(ConfigState(config=config, state='set')))
+
+    traffic_items = api.select_traffic_items()
+    for flow in flows:
+        assert(flow.name in traffic_items)
+    ixn_traffic_item = api._traffic_item.find(Name='^Clone Flow 10$')
+    ixn_stream = ixn_traffic_item.ConfigElement.find()
+    assert(ixn_stream.FrameRate.Rate == 1000)
+    ixn_field = ixn_stream.Stack.find(StackTypeId='^ipv4$').Field.find(
+        FieldTypeId='ipv4.header.srcIp')
+    assert(ixn_field.SingleValue == '1.1.1.10')
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
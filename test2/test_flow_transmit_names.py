@@ -0,0 +1,47 @@
+import pytest
+from abstract_open_traffic_generator.flow import *
+from abstract_open_traffic_generator.config import *
+from abstract_open_traffic_generator.control import *
+from abstract_open_traffic_generator.result import FlowRequest
+
+
+def test_flow_transmit_names(api, options, tx_port, rx_port):
+    """Demonstrates the following:
+    - Flow names with regex metacharacters are matched exactly
+    - A flow name that is not a configured flow is used as a regex pattern
+    - Setting the same config again updates the traffic items in place
+    """
+    endpoint = PortTxRx(tx_port_name=tx_port.name, rx_port_name=rx_port.name)
+    flows = []
+    for name in ['Flow (1)', 'Flow [2]', 'Flow 3.*']:
+        flows.append(
+            Flow(name=name,
+                 tx_rx=TxRx(endpoint),
+                 packet=[Header(Ethernet())],
+                 size=Size(128),
+                 rate=Rate(unit='pps', value=1000),
+                 duration=Duration(Continuous())))
+    config = Config(ports=[tx_port, rx_port], flows=flows, options=options)
+    api.set_state(State(ConfigState(config=config, state='set')))
+    flows[0].rate = Rate(unit='pps', value=2000)
+    api.set_state(State(ConfigState(config=config, state='set')))
+    assert(len(api._traffic_item.find()) == 3)
+    assert(sorted(api.select_traffic_items().keys()) == sorted(
+        [flow.name for flow in flows]))
+
+    api.set_state(
+        State(FlowTransmitState(state='start', flow_names=['Flow (1)'])))
+    results = api.get_flow_results(FlowRequest(column_names=['name', 'transmit']))
+    for row in results:
+        expected = 'started' if row['name'] == 'Flow (1)' else 'stopped'
+        assert(row['transmit'] == expected)
+
+    api.set_state(State(FlowTransmitState(state='stop', flow_names=['Flow .*'])))
+    results = api.get_flow_results(FlowRequest(flow_names=['Flow .*']))
+    assert(len(results) == 3)
+    for row in results:
+        assert(row['transmit'] == 'stopped')
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -44,6 +44,18 @@ def test_get_ingress_results(serializer, options, tx_port, rx_port, api):
         print(df)
         if df.frames_tx.sum() >= 10000 and df.frames_tx_rate.sum() == 0:
             break
+    assert(len(set([row['UDP SRC PORT'] for row in results])) == 100)
+    for row in results:
+        assert(row['name'] == 'UDP Flow')
+
+    # ingress results are relative to the ingress rows of a baseline
+    api.counters.set_baseline('stopped')
+    df = DataFrame.from_dict(api.get_flow_results(request))
+    assert(len(df) == 100)
+    assert(df.frames_tx.sum() == 0)
+    api.counters.select_baseline(None)
+    df = DataFrame.from_dict(api.get_flow_results(request))
+    assert(df.frames_tx.sum() >= 10000)
 
 
 if __name__ == '__main__':
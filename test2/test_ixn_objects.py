@@ -0,0 +1,36 @@
+import pytest
+from ixnetwork_open_traffic_generator.ixnobjects import IxnObjects
+
+
+def test_ixn_objects():
+    """Test that hrefs map back to config names including the hrefs of
+    unregistered children and hrefs shared by several names
+    """
+    device_group = '/api/v1/sessions/1/ixnetwork/topology/1/deviceGroup/2'
+    ixn_objects = IxnObjects()
+    ixn_objects['port 1'] = '/api/v1/sessions/1/ixnetwork/vport/1'
+    ixn_objects['device'] = device_group
+    assert(ixn_objects.get_name(device_group) == 'device')
+    assert(ixn_objects.get_name(device_group + '/ethernet/1/ipv4/1') == 'device')
+    assert(ixn_objects.get_name('/api/v1/sessions/1/ixnetwork/vport/2') is None)
+
+    ixn_objects['device'] = device_group + '/ethernet/1'
+    assert(ixn_objects.get_name(device_group) is None)
+    del ixn_objects['port 1']
+    assert(ixn_objects.get_name('/api/v1/sessions/1/ixnetwork/vport/1') is None)
+
+    ixn_objects['device 1'] = device_group
+    ixn_objects['device 2'] = device_group
+    ixn_objects['device 3'] = device_group
+    assert(ixn_objects.get_names(device_group) == ['device 1', 'device 2', 'device 3'])
+    assert(ixn_objects.get_name(device_group) is None)
+    del ixn_objects['device 2']
+    assert(ixn_objects.get_names(device_group + '/networkGroup/1') == ['device 1', 'device 3'])
+    ixn_objects.pop('device 1')
+    assert(ixn_objects.get_name(device_group) == 'device 3')
+    ixn_objects.clear()
+    assert(ixn_objects.get_name(device_group + '/ethernet/1') is None)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
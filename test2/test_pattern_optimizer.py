@@ -0,0 +1,57 @@
+import pytest
+from ixnetwork_open_traffic_generator.patternoptimizer import PatternOptimizer
+
+
+def test_optimize_progressions():
+    """Arithmetic progressions of addresses and integers become counters
+    """
+    optimizer = PatternOptimizer()
+    form = optimizer.optimize(['1.1.1.1', '1.1.1.3', '1.1.1.5', '1.1.1.7'])
+    assert(form == {
+        'choice': 'counter',
+        'start': '1.1.1.1',
+        'step': '0.0.0.2',
+        'up': True,
+        'count': 4
+    })
+    form = optimizer.optimize(
+        ['00:00:00:00:01:00', '00:00:00:00:00:ff', '00:00:00:00:00:fe'])
+    assert(form['step'] == '00:00:00:00:00:01' and form['up'] is False)
+    form = optimizer.optimize(['2001::1', '2001::1:1', '2001::2:1'])
+    assert(form['step'] == '0:0:0:0:0:0:1:0')
+    assert(optimizer.optimize([100, 200, 300])['step'] == 100)
+
+
+def test_optimize_repeats():
+    """Repeated progressions become counters with a count and repeated
+    runs become nested counters
+    """
+    optimizer = PatternOptimizer()
+    form = optimizer.optimize(['10', '11', '12', '10', '11', '12'])
+    assert(form['choice'] == 'counter' and form['count'] == 3)
+    form = optimizer.optimize(['7', '7', '7'])
+    assert(form == {'choice': 'single', 'value': '7'})
+    form = optimizer.optimize(
+        ['1.1.1.1', '1.1.1.2', '1.1.2.1', '1.1.2.2', '1.1.3.1', '1.1.3.2'])
+    assert(form == {
+        'choice': 'nested',
+        'start': '1.1.1.1',
+        'inner_step': '0.0.0.1',
+        'inner_count': 2,
+        'outer_step': '0.0.1.0',
+        'outer_count': 3
+    })
+
+
+def test_optimize_no_form():
+    """Lists without a compact form are left alone
+    """
+    optimizer = PatternOptimizer()
+    assert(optimizer.optimize(['1.1.1.1', '1.1.1.6', '1.1.1.7']) is None)
+    assert(optimizer.optimize(['1', '2']) is None)
+    assert(optimizer.optimize(['ethertype8100'] * 3) is None)
+    assert(optimizer.optimize(['1', 'a', '3']) is None)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
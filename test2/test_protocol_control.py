@@ -0,0 +1,34 @@
+import pytest
+import abstract_open_traffic_generator.control as control
+
+
+def test_protocol_control(api, b2b_ipv4_flow_config):
+    """Demonstrates the following:
+    - Start the topologies of all devices without waiting for them
+    - Report the progress of every topology
+    - Start the ipv4 flow as soon as its endpoint topologies are started
+    - Stop all topologies
+    """
+    api.set_state(
+        control.State(
+            control.ConfigState(config=b2b_ipv4_flow_config, state='set')))
+
+    def progress(topology_name, topology):
+        print('%s %s' % (topology_name, [
+            device_group['status']
+            for device_group in topology.get('deviceGroup', [])
+        ]))
+
+    futures = api.protocol.start_async(progress=progress)
+    api.protocol.wait(api.protocol.get_endpoint_topologies(['Ipv4 Flow']))
+    api.set_state(
+        control.State(
+            control.FlowTransmitState(state='start',
+                                      flow_names=['Ipv4 Flow'])))
+    for name, future in futures.items():
+        print('%s started in %ssecs' % (name, future.result()))
+    api.protocol.stop()
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -0,0 +1,48 @@
+import pytest
+from abstract_open_traffic_generator.port import Port
+from abstract_open_traffic_generator.device import *
+from abstract_open_traffic_generator.config import Config
+from ixnetwork_open_traffic_generator.ixnetworkapi import IxNetworkApi
+
+
+def validate(device_count, route_ranges, route_count_per_device):
+    api = IxNetworkApi()
+    port = Port('port 1')
+    api._config = Config(ports=[port])
+    api._config.devices.append(
+        Device(name='device',
+               container_name=port.name,
+               device_count=device_count,
+               choice=Bgpv4(name='bgpv4',
+                            ipv4=Ipv4(name='ipv4',
+                                      ethernet=Ethernet(name='eth')))))
+    api.set_route_ranges('bgpv4', route_ranges, route_count_per_device)
+    api.validation.validate_config()
+    return api
+
+
+def test_route_range_validation():
+    """Demonstrates route counts that are validated before anything is
+    sent to the server
+    """
+    route_range = Bgpv4RouteRange(name='route range',
+                                  address=Pattern('20.0.0.0'),
+                                  prefix=Pattern('32'))
+    api = validate(10, [route_range], 100000)
+    assert(api.get_config_object('route range') is route_range)
+    with pytest.raises(ValueError, match='total route count'):
+        validate(100, [route_range], 200000)
+    with pytest.raises(ValueError, match='must be a positive integer'):
+        validate(1, [route_range], 0)
+    with pytest.raises(ValueError, match='exceed the ipv4 address space'):
+        validate(2, [
+            Bgpv4RouteRange(name='route range',
+                            address=Pattern('255.255.255.0'),
+                            prefix=Pattern('24'))
+        ], 1)
+    with pytest.raises(ValueError, match='is not unique'):
+        validate(1, [Bgpv4RouteRange(name='ipv4')], 1)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
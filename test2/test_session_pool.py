@@ -0,0 +1,30 @@
+import pytest
+from abstract_open_traffic_generator.control import *
+from abstract_open_traffic_generator.config import *
+
+
+@pytest.mark.ConfigTest
+def test_session_pool(serializer, session_pool):
+    """Demonstrates leasing a warm session from a session pool and
+    returning it instead of removing it
+    """
+    if session_pool is None:
+        pytest.skip('session pool is disabled')
+    from ixnetwork_open_traffic_generator.ixnetworkapi import IxNetworkApi
+    from .conftest import API_SERVER, API_SERVER_PORT
+    session_pool.warm()
+    idle = session_pool.idle
+    leased = session_pool.leased
+    api = IxNetworkApi(API_SERVER,
+                       port=API_SERVER_PORT,
+                       session_pool=session_pool)
+    api.set_state(State(ConfigState(config=Config(), state='set')))
+    assert(session_pool.leased == leased + 1)
+    assert(len(api.assistant.Ixnetwork.Vport.find()) == 0)
+    api.close()
+    assert(session_pool.leased == leased)
+    assert(session_pool.idle == idle)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -0,0 +1,20 @@
+import pytest
+from ixnetwork_open_traffic_generator.trafficitem import TrafficItem
+
+
+def test_stack_alignment():
+    """Existing stacks are kept where they align with the desired stacks
+    """
+    traffic_item = TrafficItem(None)
+    matches = traffic_item._align_stack(['ethernet', 'ipv4', 'tcp'],
+                                        ['ethernet', 'vlan', 'ipv4', 'tcp'])
+    assert(matches == {0: 0, 1: 2, 2: 3})
+    matches = traffic_item._align_stack(['ethernet', 'vlan', 'ipv4', 'tcp'],
+                                        ['ethernet', 'ipv4', 'udp'])
+    assert(matches == {0: 0, 2: 1})
+    matches = traffic_item._align_stack(['ethernet'], ['pfcPause'])
+    assert(matches == {})
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -0,0 +1,28 @@
+import pytest
+import abstract_open_traffic_generator.control as control
+from ixnetwork_open_traffic_generator.statview import StatView
+
+
+def test_stat_view(api, b2b_ipv4_flow_config):
+    """Demonstrates the following:
+    - Read a statistics view in chunks of a fixed number of rows
+    - The next page is read while the current chunk is processed
+    """
+    api.set_state(
+        control.State(
+            control.ConfigState(config=b2b_ipv4_flow_config, state='set')))
+    api.set_state(control.State(control.FlowTransmitState(state='start')))
+
+    view = StatView(api, 'Flow Statistics', page_size=2)
+    row_count = 0
+    for chunk in view.chunks(chunk_size=3):
+        assert (len(chunk) <= 3)
+        row_count += len(chunk)
+    assert (row_count == view.total_rows)
+    assert ('Tx Frames' in view.column_captions)
+    for row in view.rows():
+        print(row['Traffic Item'], row['Tx Frames'])
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])
@@ -0,0 +1,46 @@
+import pytest
+import pandas
+from abstract_open_traffic_generator.flow import *
+from abstract_open_traffic_generator.config import *
+from abstract_open_traffic_generator.control import *
+
+
+def test_throughput(api, options, tx_port, rx_port):
+    """Demonstrates the following:
+    - Search the throughput of a flow for several frame sizes
+    - Rates and frame sizes are changed on the fly between trials
+    - Display the throughput and latency table and every trial
+    """
+    endpoint = PortTxRx(tx_port_name=tx_port.name, rx_port_name=rx_port.name)
+    flow = Flow(name='Throughput Flow',
+                tx_rx=TxRx(endpoint),
+                packet=[Header(Ethernet()), Header(Ipv4())],
+                size=Size(128),
+                rate=Rate(unit='line', value=10),
+                duration=Duration(Continuous()))
+    config = Config(ports=[tx_port, rx_port], flows=[flow], options=options)
+    api.set_state(State(ConfigState(config=config, state='set')))
+
+    table = api.throughput.search([flow.name],
+                                  frame_sizes=[64, 512, 1518],
+                                  resolution=1.0,
+                                  duration=5,
+                                  strategy='guided',
+                                  latency=True)
+    print(pandas.DataFrame.from_dict(table))
+    print(pandas.DataFrame.from_dict(api.throughput.trials))
+    assert(len(table) == 3)
+    for row in table:
+        assert(row['throughput'] is not None)
+
+    # the configured size and rate are restored after the search
+    api.set_state(State(ConfigState(config=config, state='set')))
+    assert(len(api.traffic_item.changes) == 0)
+    ixn_stream = api._traffic_item.find(
+        Name='^Throughput Flow$').ConfigElement.find()
+    assert(ixn_stream.FrameSize.FixedSize == 128)
+    assert(ixn_stream.FrameRate.Rate == 10)
+
+
+if __name__ == '__main__':
+    pytest.main(['-s', __file__])